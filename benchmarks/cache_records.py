@@ -0,0 +1,130 @@
+"""
+Compares the cost of the cached records with the pydantic models they replaced.
+
+For 10k events and 100k students, the time taken to build the objects from database documents and the
+growth of the resident set size (RSS) of the process holding them are reported. Every measurement runs in
+a fresh process so the results do not influence each other.
+
+Run with `python -m benchmarks.cache_records` from the repository root.
+"""
+import gc
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from mitblr_club_api.models.cached.events import EventCache
+from mitblr_club_api.models.cached.students import StudentCache
+from mitblr_club_api.models.internal.events import Event
+from mitblr_club_api.models.internal.students import Student
+
+EVENTS = 10_000
+STUDENTS = 100_000
+
+
+def event_documents(count: int) -> list[dict]:
+    start = datetime(2023, 8, 1)
+
+    return [
+        {
+            "_id": ObjectId(),
+            "club": "codex",
+            "date": start + timedelta(hours=i),
+            "location": f"Room {i % 40}",
+            "name": f"Event {i}",
+            "participants": {
+                "registered": [ObjectId() for _ in range(5)],
+                "attended": [ObjectId() for _ in range(2)],
+            },
+            "slug": f"event-{i}",
+            "sort_year": "2023",
+        }
+        for i in range(count)
+    ]
+
+
+def student_documents(count: int) -> list[dict]:
+    return [
+        {
+            "_id": ObjectId(),
+            "academic": {"course": "CSE_CORE", "year": 2023},
+            "application_number": 230_000_000 + i,
+            "clubs": [ObjectId()],
+            "email": f"student{i}@example.com",
+            "events": [{"event_id": ObjectId(), "attended": bool(i % 2)}],
+            "institution": "MIT-BLR",
+            "mess_provider": "BlueDove",
+            "name": f"Student {i}",
+            "phone_number": "9999999999",
+            "registration_number": 230_900_000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+# Ways of building each kind of object from its documents.
+BUILDERS = {
+    "events/pydantic": (event_documents, EVENTS, lambda doc: Event(**doc)),
+    "events/record": (event_documents, EVENTS, EventCache.from_document),
+    "students/pydantic": (student_documents, STUDENTS, lambda doc: Student(**doc)),
+    "students/record": (student_documents, STUDENTS, StudentCache.from_document),
+}
+
+
+def rss() -> int:
+    """Current resident set size of the process, in bytes."""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, in kilobytes on Linux and in bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(name: str, results: multiprocessing.Queue):
+    documents_of, count, build = BUILDERS[name]
+    documents = documents_of(count)
+
+    gc.collect()
+    before = rss()
+
+    start = time.perf_counter()
+    objects = [build(document) for document in documents]
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    results.put((name, count, elapsed, rss() - before, len(objects)))
+
+
+def main():
+    # The validation of the pydantic models must not fail half way through the benchmark.
+    for documents_of, _, build in BUILDERS.values():
+        build(documents_of(1)[0])
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    print(
+        f"{'objects':<20}{'count':>10}{'build (s)':>12}{'per object (us)':>18}{'RSS (MiB)':>12}"
+    )
+
+    for name in BUILDERS:
+        process = context.Process(target=measure, args=(name, results))
+        process.start()
+        name, count, elapsed, grown, _ = results.get()
+        process.join()
+
+        print(
+            f"{name:<20}{count:>10}{elapsed:>12.3f}{elapsed / count * 1e6:>18.2f}"
+            f"{grown / (1024 * 1024):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares the throughput of signing and verifying the tokens issued by the API, with every supported algorithm.
+
+Tokens carry the claims of an operator logging in (see the `/login` endpoint). They are signed and verified
+through the key manager, as the server does, bypassing the verified token cache so every verification checks
+the signature.
+
+Run with `python -m benchmarks.jwt_algorithms` from the repository root.
+"""
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from mitblr_club_api.utils.keys import Key, KeyManager
+
+# Seconds each measurement runs for.
+DURATION = 2.0
+
+PRIVATE_KEYS = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def claims() -> dict:
+    now = datetime.utcnow()
+
+    return {
+        "auth_id": str(ObjectId()),
+        "student_id": str(ObjectId()),
+        "team_id": str(ObjectId()),
+        "exp": now + timedelta(minutes=90),
+        "iat": now,
+        "nbf": now,
+        "iss": "MITBLR_CLUB_API_BENCHMARK",
+    }
+
+
+def throughput(operation) -> float:
+    """Operations per second, over `DURATION` seconds."""
+
+    count = 0
+    start = time.perf_counter()
+    deadline = start + DURATION
+
+    while time.perf_counter() < deadline:
+        for _ in range(10):
+            operation()
+        count += 10
+
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    print(
+        f"{'algorithm':<12}{'token (B)':>12}{'sign (/s)':>14}{'verify (/s)':>14}{'verify (us)':>14}"
+    )
+
+    for algorithm, generate in PRIVATE_KEYS.items():
+        private = generate()
+        key = Key(algorithm, algorithm, private.public_key(), private)
+        keys = KeyManager([key], algorithm)
+
+        payload = claims()
+        token = keys.sign(payload)
+
+        signs = throughput(lambda: keys.sign(payload))
+        verifies = throughput(lambda: keys.decode(token))
+
+        print(
+            f"{algorithm:<12}{len(token):>12}{signs:>14.0f}{verifies:>14.0f}{1e6 / verifies:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Package for API endpoints."""
 from mitblr_club_api.app import appserver
+from .admin import AdminCache, AdminPasswords, AdminRevocations, AdminSessions
 from .clubs.base import Clubs
 from .clubs.core import ClubsCore
 from .clubs.events import ClubEvents
@@ -41,3 +42,10 @@ appserver.add_route(
     "/events/<slug:str>/register/<uuid:int>",
     strict_slashes=False,
 )
+
+appserver.add_route(AdminCache.as_view(), "/admin/cache", strict_slashes=False)
+appserver.add_route(AdminPasswords.as_view(), "/admin/passwords", strict_slashes=False)
+appserver.add_route(
+    AdminRevocations.as_view(), "/admin/revocations", strict_slashes=False
+)
+appserver.add_route(AdminSessions.as_view(), "/admin/sessions", strict_slashes=False)
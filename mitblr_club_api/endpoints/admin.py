@@ -0,0 +1,123 @@
+"""API endpoints for operating the API."""
+from sanic.request import Request
+from sanic.response import json
+from sanic.views import HTTPMethodView
+from sanic_ext import validate
+
+from mitblr_club_api.decorators.authorized import authorized_incls
+from mitblr_club_api.models.enums.permission import Permission
+from mitblr_club_api.models.request.revocation import RevocationRequest
+
+
+class AdminCache(HTTPMethodView):
+    """Endpoints regarding the in-memory cache."""
+
+    @authorized_incls(Permission.ADMIN)
+    async def get(self, request: Request):
+        """
+        Get the metrics of the caches of the worker serving the request.
+
+        :param request: Sanic request.
+        :type request: Request
+
+        :return: JSON with, for every cache, the hits, misses, evictions, expirations, current size,
+                 approximate memory use and load latency histogram, along with the number of coalesced
+                 loads and the metrics of the verified token cache.
+        :rtype: JSONResponse
+        """
+
+        return json(
+            {**request.app.ctx.cache.stats(), "token": request.app.ctx.tokens.stats()}
+        )
+
+
+class AdminPasswords(HTTPMethodView):
+    """Endpoints regarding the password hashing pool."""
+
+    @authorized_incls(Permission.ADMIN)
+    async def get(self, request: Request):
+        """
+        Get the utilisation of the password hashing pool of the worker serving the request.
+
+        :param request: Sanic request.
+        :type request: Request
+
+        :return: JSON with the size, current load and utilisation of the pool, the number of completed,
+                 refused and throttled hashes, and the histograms of the time spent queued and hashing.
+        :rtype: JSONResponse
+        """
+
+        return json(request.app.ctx.passwords.stats())
+
+
+class AdminRevocations(HTTPMethodView):
+    """Endpoints regarding the revoked tokens."""
+
+    @authorized_incls(Permission.ADMIN)
+    async def get(self, request: Request):
+        """
+        Get the metrics of the revocation list of the worker serving the request.
+
+        :param request: Sanic request.
+        :type request: Request
+
+        :return: JSON with the number of revoked tokens and authentications, and the number of tokens checked
+                 and refused as revoked.
+        :rtype: JSONResponse
+        """
+
+        return json(request.app.ctx.revocations.stats())
+
+    @authorized_incls(Permission.ADMIN)
+    @validate(json=RevocationRequest)
+    async def post(self, request: Request, body: RevocationRequest):
+        """
+        Revoke a token by its ID (`jti`), or every token issued so far to an authentication (`auth_id`) along
+        with its sessions.
+
+        :param request: Sanic request.
+        :type request: Request
+        :param body: ID of the token or of the authentication.
+        :type body: RevocationRequest
+
+        :return: JSON response with code 201 once revoked. JSON response with code 400 if neither or both of
+                 the IDs are given.
+        :rtype: JSONResponse
+        """
+
+        if (body.jti is None) == (body.auth_id is None):
+            return json(
+                {
+                    "status": 400,
+                    "error": "Bad Request",
+                    "message": "Exactly one of jti and auth_id is required.",
+                },
+                status=400,
+            )
+
+        if body.jti is not None:
+            await request.app.ctx.revocations.revoke_token(body.jti)
+        else:
+            await request.app.ctx.revocations.revoke_auth(body.auth_id)
+            await request.app.ctx.sessions.revoke_auth(body.auth_id)
+
+        return json({"status": 201, "message": "Revoked."}, status=201)
+
+
+class AdminSessions(HTTPMethodView):
+    """Endpoints regarding the sessions refreshing tokens."""
+
+    @authorized_incls(Permission.ADMIN)
+    async def get(self, request: Request):
+        """
+        Get the metrics of the sessions of the worker serving the request.
+
+        :param request: Sanic request.
+        :type request: Request
+
+        :return: JSON with the number of sessions started and refreshed, and of refresh tokens refused and
+                 reused.
+        :rtype: JSONResponse
+        """
+
+        return json(request.app.ctx.sessions.stats())
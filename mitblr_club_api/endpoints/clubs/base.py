@@ -1,4 +1,5 @@
 """API endpoints for clubs."""
+from datetime import datetime
 from typing import Optional
 
 from motor.motor_asyncio import AsyncIOMotorCollection
@@ -124,9 +125,14 @@ class Clubs(HTTPMethodView):
                 "events": {},
                 "operations": [],
                 "team": [],
+                "updated_at": datetime.utcnow(),
             }
 
             result = await collection.insert_one(club)
+
+            # The existence check above cached the club as missing.
+            request.app.ctx.cache.forget_missing_club(body.slug)
+
             return json({"Insert": "True", "ObjectId": str(result.inserted_id)})
 
         return json(
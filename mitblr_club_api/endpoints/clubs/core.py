@@ -21,20 +21,25 @@ class ClubsCore(HTTPMethodView):
     async def get(self, request: Request, club_slug: str):
         """Get Club's core committee."""
 
-        clubs_collection: AsyncIOMotorCollection = request.app.ctx.db["clubs"]
-        club_teams_collection: AsyncIOMotorCollection = request.app.ctx.db["club_teams"]
-        student_collection: AsyncIOMotorCollection = request.app.ctx.db["students"]
-
-        core_committee = await clubs_collection.find_one(
-            {"slug": club_slug}, {"_id": 0, "core_committee": 1}
+        cache = request.app.ctx.cache
+
+        # The reads are cached, and dropped whenever the club, one of its teams or students is written.
+        core_committee = await cache.find_one(
+            "clubs",
+            {"slug": club_slug},
+            {"_id": 0, "core_committee": 1},
+            tags=[f"club:{club_slug}"],
         )
 
         core_committee_members = [
             {"position": position, "student_id": member["student_id"]}
             for position, team_id in core_committee["core_committee"].items()
-            for member in await club_teams_collection.find(
-                {"_id": ObjectId(team_id)}
-            ).to_list(length=MAX_LENGTH)
+            for member in await cache.find(
+                "club_teams",
+                {"_id": ObjectId(team_id)},
+                tags=[f"team:{team_id}"],
+                length=MAX_LENGTH,
+            )
             if member is not None
         ]
 
@@ -46,9 +51,12 @@ class ClubsCore(HTTPMethodView):
                 "email": student["email"],
             }
             for member in core_committee_members
-            for student in await student_collection.find(
-                {"_id": ObjectId(member["student_id"])}
-            ).to_list(length=MAX_LENGTH)
+            for student in await cache.find(
+                "students",
+                {"_id": ObjectId(member["student_id"])},
+                tags=[f"student:{member['student_id']}"],
+                length=MAX_LENGTH,
+            )
         ]
 
         return json(core_committee_list)
@@ -147,10 +155,14 @@ class ClubsCore(HTTPMethodView):
             update = {
                 "$set": {
                     f"core_committee.{position['name']}": ObjectId(result.inserted_id)
-                }
+                },
+                # Picked up by the incremental cache refresh.
+                "$currentDate": {"updated_at": True},
             }
             await clubs.update_one(filter, update, upsert=True)
 
+            request.app.ctx.cache.invalidate(f"club:{body.club}")
+
         # Inserting to authentication collection if api_access = true
         if body.api_access:
             auth_list = {
@@ -162,6 +174,9 @@ class ClubsCore(HTTPMethodView):
             }
             await auth.insert_one(auth_list)
 
+        # The permissions of the student changed.
+        request.app.ctx.cache.invalidate(f"student:{student['_id']}")
+
         return json({"Insert": "True", "ObjectId": str(result.inserted_id)})
 
     # TODO - Data Validation
@@ -1,4 +1,5 @@
 """API endpoints for club events."""
+from datetime import datetime
 from typing import Optional
 
 from motor.motor_asyncio import AsyncIOMotorCollection
@@ -8,6 +9,7 @@ from sanic.views import HTTPMethodView
 from sanic_ext import validate
 
 from mitblr_club_api.decorators.authorized import authorized_incls
+from mitblr_club_api.models.enums.permission import Permission
 from mitblr_club_api.models.request.events import EventRequest
 
 
@@ -20,8 +22,7 @@ class ClubEvents(HTTPMethodView):
 
     # TODO - Check valid Club Slug
     # TODO - Check JWT Scope for Club
-    # TODO - Check JWT for creation permissions
-    @authorized_incls
+    @authorized_incls(Permission.CREATE_EVENT)
     @validate(json=EventRequest)
     async def post(
         self,
@@ -75,9 +76,13 @@ class ClubEvents(HTTPMethodView):
         data["club"] = club_slug
         data["slug"] = event_slug
         data["participants"] = {}
+        data["updated_at"] = datetime.utcnow()
 
         result = await collection.insert_one(data)
 
+        # The existence check above cached the event as missing.
+        request.app.ctx.cache.forget_missing_event(event_slug, year=sort_year)
+
         return json(
             {
                 "status": 201,
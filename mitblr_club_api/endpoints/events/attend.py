@@ -8,8 +8,9 @@ from sanic.views import HTTPMethodView
 # from sanic.log import logger
 
 from mitblr_club_api.decorators.authorized import authorized_incls
+from mitblr_club_api.models.enums.permission import Permission
 from mitblr_club_api.models.cached.events import EventCache
-from mitblr_club_api.models.internal.students import Student
+from mitblr_club_api.models.cached.students import StudentCache, StudentProfile
 
 
 class EventsAttend(HTTPMethodView):
@@ -44,7 +45,9 @@ class EventsAttend(HTTPMethodView):
                 status=404,
             )
 
-        student: Student = await request.app.ctx.cache.get_student(student_id=uuid)
+        student: StudentCache = await request.app.ctx.cache.get_student(
+            student_id=uuid, profile=StudentProfile.EVENTS
+        )
 
         if not student:
             return json(
@@ -54,7 +57,7 @@ class EventsAttend(HTTPMethodView):
 
         for s_event in student.events:
             if event.id == s_event["event_id"]:
-                if s_event.attended:
+                if s_event["attended"]:
                     return json(
                         {
                             "status": 200,
@@ -81,7 +84,7 @@ class EventsAttend(HTTPMethodView):
         )
 
     # TODO: Data validation.
-    @authorized_incls
+    @authorized_incls(Permission.MARK_ATTENDANCE)
     async def post(self, request: Request, slug: str, uuid: int):
         """
         Mark the attendance of an event attendee with an event slug and student application number.
@@ -113,7 +116,9 @@ class EventsAttend(HTTPMethodView):
                 status=404,
             )
 
-        student: Student = await request.app.ctx.cache.get_student(student_id=uuid)
+        student: StudentCache = await request.app.ctx.cache.get_student(
+            student_id=uuid, profile=StudentProfile.EVENTS
+        )
 
         # Checking if student exists
         if not student:
@@ -122,24 +127,21 @@ class EventsAttend(HTTPMethodView):
                 status=404,
             )
 
-        event_id = event["_id"]
-
         # Checking if student attendance is already marked
-        for attendee in event["participants"]["attended"]:
-            if attendee == student["_id"]:
-                return json(
-                    {
-                        "status": 409,
-                        "error": "Conflict",
-                        "message": "Student attendance is already marked.",
-                    },
-                    status=409,
-                )
+        if student.id in event.participants.get("attended", []):
+            return json(
+                {
+                    "status": 409,
+                    "error": "Conflict",
+                    "message": "Student attendance is already marked.",
+                },
+                status=409,
+            )
 
-        for event in student.events:
-            if event.event_id == event["_id"]:
+        for student_event in student.events:
+            if student_event["event_id"] == event.id:
                 # Student is registered
-                if event.attended:
+                if student_event["attended"]:
                     return json(
                         {
                             "status": 409,
@@ -150,54 +152,92 @@ class EventsAttend(HTTPMethodView):
                     )
                 else:
                     # Updating attendance in events field in student document in students collection
-                    # Match the specific event_id within the events array.
+                    # Match the specific event_id within the events array, if not attended yet.
                     query = {
-                        "application_number": student.application_number,
-                        "events.event_id": event_id,
+                        "_id": student.id,
+                        "events": {
+                            "$elemMatch": {"event_id": event.id, "attended": False}
+                        },
                     }
 
                     # Update the attendance field of the matched element.
                     update = {"$set": {"events.$.attended": True}}
 
-                    await students.update_one(query, update)
+                    result = await students.update_one(query, update)
+
+                    # A concurrent request marked it since the cache was read.
+                    if result.modified_count == 0:
+                        return json(
+                            {
+                                "status": 409,
+                                "error": "Conflict",
+                                "message": "Student attendance is already marked.",
+                            },
+                            status=409,
+                        )
 
                     # Update on event object in the events collection.
                     await events.update_one(
-                        {"_id": event_id},
-                        {"$push": {"participants.attended": ObjectId(student["_id"])}},
+                        {"_id": event.id},
+                        {
+                            "$addToSet": {
+                                "participants.attended": ObjectId(student.id)
+                            },
+                            "$currentDate": {"updated_at": True},
+                        },
+                    )
+
+                    # Apply the attendance to the cached student and event.
+                    request.app.ctx.cache.mark_attendance(
+                        student.id, event.slug, event.id
                     )
+
                     return json(
                         {
                             "status": 200,
                             "message": "Student attendance has been updated.",
                         }
                     )
+
         # Student is not registered so register them as onspot
-        await students.update_one(
-            {"application_number": uuid},
-            {
-                "$push": {
-                    "events": {
-                        "event_id": event_id,
-                        "registration": "onspot",
-                        "sort_year:": request.app.config["SORT_YEAR"],
-                        "attended": True,
-                    }
-                }
-            },
+        registration = {
+            "event_id": event.id,
+            "registration": "onspot",
+            "sort_year": request.app.config["SORT_YEAR"],
+            "attended": True,
+        }
+
+        # Unless a concurrent request registered them since the cache was read.
+        result = await students.update_one(
+            {"_id": student.id, "events.event_id": {"$ne": event.id}},
+            {"$push": {"events": registration}},
         )
 
+        if result.modified_count == 0:
+            return json(
+                {
+                    "status": 409,
+                    "error": "Conflict",
+                    "message": "Student has been registered meanwhile, retry to mark the attendance.",
+                },
+                status=409,
+            )
+
         # Update registered students in event collection
         await events.update_one(
-            {"_id": event_id},
+            {"_id": event.id},
             {
-                "$push": {
-                    "participants.registered": ObjectId(student["_id"]),
-                    "participants.attended": ObjectId(student["_id"]),
-                }
+                "$addToSet": {
+                    "participants.registered": ObjectId(student.id),
+                    "participants.attended": ObjectId(student.id),
+                },
+                "$currentDate": {"updated_at": True},
             },
         )
 
+        # Apply the registration to the cached student and event.
+        request.app.ctx.cache.register_student(student.id, event.slug, registration)
+
         return json(
             {
                 "status": 200,
@@ -205,8 +245,7 @@ class EventsAttend(HTTPMethodView):
             }
         )
 
-    # TODO - Scope Check (Operations Lead)
-    @authorized_incls
+    @authorized_incls(Permission.MODIFY_ATTENDANCE)
     async def delete(self, request: Request, slug: str, uuid: int):
         """Deletion of Attendance"""
 
@@ -223,7 +262,9 @@ class EventsAttend(HTTPMethodView):
                 status=404,
             )
 
-        student: Student = await request.app.ctx.cache.get_student(student_id=uuid)
+        student: StudentCache = await request.app.ctx.cache.get_student(
+            student_id=uuid, profile=StudentProfile.EVENTS
+        )
 
         # Check if student exists
         if not student:
@@ -234,19 +275,27 @@ class EventsAttend(HTTPMethodView):
 
         # Check if student is registered
         for student_event in student.events:
-            if student_event["event_id"] == event["_id"]:
+            if student_event["event_id"] == event.id:
                 # Update attendance in student collection
                 await students.update_one(
-                    {"application_number": uuid},
-                    {"$set": {"events.$[].attended": False}},
+                    {"_id": student.id, "events.event_id": event.id},
+                    {"$set": {"events.$.attended": False}},
                 )
 
                 # Update attendeded students in event collection
 
                 # Delete from attended
                 await events.update_one(
-                    {"_id": event["_id"]},
-                    {"$pull": {"participants.attended": ObjectId(student["_id"])}},
+                    {"_id": event.id},
+                    {
+                        "$pull": {"participants.attended": ObjectId(student.id)},
+                        "$currentDate": {"updated_at": True},
+                    },
+                )
+
+                # Apply the removed attendance to the cached student and event.
+                request.app.ctx.cache.mark_attendance(
+                    student.id, event.slug, event.id, attended=False
                 )
 
                 return json(
@@ -1,10 +1,15 @@
 """API endpoints for events"""
+from datetime import datetime, timedelta
+
 from sanic.request import Request
 from sanic.response import json
 from sanic.views import HTTPMethodView
 
 from mitblr_club_api.models.cached.events import EventCache
 
+# Longest window of events which may be requested at once.
+MAX_WINDOW = timedelta(days=366)
+
 
 class Events(HTTPMethodView):
     """Endpoints regarding events."""
@@ -23,13 +28,68 @@ class Events(HTTPMethodView):
                  next week if the slug is an empty string. JSON with code 404 if the event does not exist
                  in either slug case.
         :rtype: JSONResponse
+
+        When the slug is empty, the `from` and `to` query arguments (ISO 8601 dates) select the window of
+        events to return instead, `from` being inclusive and `to` exclusive. A missing `from` defaults to
+        today, a missing `to` to a week after `from`. The `club` query argument, which may be repeated,
+        limits the events to the given clubs. Windows longer than a year are refused with code 400.
         """
 
         if event_slug == "":
-            # Slug is empty, return the events in the next week.
-            events: list[
-                EventCache
-            ] = await request.app.ctx.cache.get_event_by_timedelta(delta=7)
+            if request.args:
+                # Slug is empty, return the events in the requested window.
+                try:
+                    start = datetime.fromisoformat(request.args.get("from"))
+                except TypeError:
+                    start = datetime.utcnow().replace(
+                        hour=0, minute=0, second=0, microsecond=0
+                    )
+                except ValueError:
+                    return json(
+                        {
+                            "status": 400,
+                            "error": "Bad Request",
+                            "message": "Invalid from.",
+                        },
+                        status=400,
+                    )
+
+                try:
+                    end = datetime.fromisoformat(request.args.get("to"))
+                except TypeError:
+                    end = start + timedelta(days=7)
+                except ValueError:
+                    return json(
+                        {
+                            "status": 400,
+                            "error": "Bad Request",
+                            "message": "Invalid to.",
+                        },
+                        status=400,
+                    )
+
+                # Offsets are ignored, they do not matter at the scale of the limit.
+                if end.replace(tzinfo=None) - start.replace(tzinfo=None) > MAX_WINDOW:
+                    return json(
+                        {
+                            "status": 400,
+                            "error": "Bad Request",
+                            "message": f"The window may not exceed {MAX_WINDOW.days} days.",
+                        },
+                        status=400,
+                    )
+
+                events: list[
+                    EventCache
+                ] = await request.app.ctx.cache.get_events_between(
+                    start, end, clubs=request.args.getlist("club")
+                )
+
+            else:
+                # Slug is empty, return the events in the next week.
+                events: list[
+                    EventCache
+                ] = await request.app.ctx.cache.get_event_by_timedelta(delta=7)
 
             if events:
                 return json(
@@ -9,7 +9,7 @@ from sanic.views import HTTPMethodView
 
 from mitblr_club_api.decorators.authorized import authorized_incls
 from mitblr_club_api.models.cached.events import EventCache
-from mitblr_club_api.models.internal.students import Student
+from mitblr_club_api.models.cached.students import StudentCache, StudentProfile
 
 
 class EventsRegister(HTTPMethodView):
@@ -42,7 +42,9 @@ class EventsRegister(HTTPMethodView):
                 status=404,
             )
 
-        student: Student = await request.app.ctx.cache.get_student(student_id=uuid)
+        student: StudentCache = await request.app.ctx.cache.get_student(
+            student_id=uuid, profile=StudentProfile.EVENTS
+        )
 
         if not student:
             return json(
@@ -96,7 +98,9 @@ class EventsRegister(HTTPMethodView):
                 status=404,
             )
 
-        student: Student = await request.app.ctx.cache.get_student(student_id=uuid)
+        student: StudentCache = await request.app.ctx.cache.get_student(
+            student_id=uuid, profile=StudentProfile.EVENTS
+        )
 
         # Check if student exists
         if not student:
@@ -115,30 +119,39 @@ class EventsRegister(HTTPMethodView):
                     }
                 )
 
-        # Register student for event
-        await students.update_one(
-            {"application_number": uuid},
-            {
-                "$push": {
-                    "events": {
-                        "event_id": event.id,
-                        "registration": "time",
-                        "sort_year:": request.app.config["SORT_YEAR"],
-                        "attended": False,
-                    }
-                }
-            },
+        registration = {
+            "event_id": event.id,
+            "registration": "time",
+            "sort_year": request.app.config["SORT_YEAR"],
+            "attended": False,
+        }
+
+        # Register student for event, unless a concurrent request registered them since the cache was read.
+        result = await students.update_one(
+            {"_id": student.id, "events.event_id": {"$ne": event.id}},
+            {"$push": {"events": registration}},
         )
 
-        # Refresh student cache
-        await request.app.ctx.cache.fetch_student(uuid)
+        if result.modified_count == 0:
+            return json(
+                {
+                    "status": 200,
+                    "message": "Student is already registered for the event.",
+                }
+            )
 
         # Update registered students in event collection
         await events.update_one(
             {"_id": event.id},
-            {"$push": {"participants.registered": ObjectId(student._id)}},
+            {
+                "$addToSet": {"participants.registered": ObjectId(student.id)},
+                "$currentDate": {"updated_at": True},
+            },
         )
 
+        # Apply the registration to the cached student and event, no need to read them again.
+        request.app.ctx.cache.register_student(student.id, event.slug, registration)
+
         return json(
             {"status": 200, "message": "Student has been registered for event."}
         )
@@ -148,12 +161,10 @@ class EventsRegister(HTTPMethodView):
     async def delete(self, request: Request, slug: str, uuid: int):
         """Deletion of Registrations"""
 
-        year = request.app.config["SORT_YEAR"]
-
         students: AsyncIOMotorClient = request.app.ctx.db["students"]
         events: AsyncIOMotorClient = request.app.ctx.db["events"]
 
-        event = await events.find_one({"slug": slug, "sort_year": year})
+        event: EventCache = await request.app.ctx.cache.get_event(slug)
 
         # Check if event exists
         if not event:
@@ -173,25 +184,29 @@ class EventsRegister(HTTPMethodView):
 
         # Check if student is registered
         for student_event in student["events"]:
-            if student_event["event_id"] == event["_id"]:
+            if student_event["event_id"] == event.id:
                 # Remove student from event
                 await students.update_one(
                     {"application_number": uuid},
-                    {"$pull": {"events": {"event_id": event["_id"]}}},
+                    {"$pull": {"events": {"event_id": event.id}}},
                 )
 
                 # Update registered students in event collection
 
-                # Delete from registered
+                # Delete from registered and attended
                 await events.update_one(
-                    {"_id": event["_id"]},
-                    {"$pull": {"participants.registered": ObjectId(student["_id"])}},
+                    {"_id": event.id},
+                    {
+                        "$pull": {
+                            "participants.registered": ObjectId(student["_id"]),
+                            "participants.attended": ObjectId(student["_id"]),
+                        },
+                        "$currentDate": {"updated_at": True},
+                    },
                 )
 
-                # Delete from attended
-                await events.update_one(
-                    {"_id": event["_id"]},
-                    {"$pull": {"participants.attended": ObjectId(student["_id"])}},
+                request.app.ctx.cache.unregister_student(
+                    student["_id"], event.slug, event.id
                 )
 
                 return json(
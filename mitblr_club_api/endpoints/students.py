@@ -10,7 +10,7 @@ from sanic.views import HTTPMethodView
 from sanic_ext import validate
 
 from mitblr_club_api.decorators.authorized import authorized_incls
-from mitblr_club_api.models.internal.students import Student
+from mitblr_club_api.models.cached.students import StudentCache
 from mitblr_club_api.models.request.student import StudentRequest
 
 
@@ -32,7 +32,7 @@ class Students(HTTPMethodView):
         :rtype: JSONResponse
         """
 
-        student: Student = await request.app.ctx.cache.get_student(uuid)
+        student: StudentCache = await request.app.ctx.cache.get_student(uuid)
 
         data: dict[str, bool | str]
         if student is None:
@@ -103,6 +103,12 @@ class Students(HTTPMethodView):
         }
 
         result = await collection.insert_one(student)
+
+        # Lookups of the student before its creation may have been cached as missing.
+        request.app.ctx.cache.forget_missing_student(
+            body.application_number, body.registration_number, body.email
+        )
+
         data = {"status": 200, "ObjectId": str(result.inserted_id)}
 
         return json(data)
@@ -1,142 +1,419 @@
 """The name dictionary used for holding the different caches."""
 
-from datetime import datetime, timedelta
-from typing import Optional, Union
+import asyncio
+import math
+from heapq import merge
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional, Union
 
+import bson
 from bson import ObjectId
-from cachetools import TTLCache
+from bson.errors import BSONError
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from sanic.log import logger
 
 from mitblr_club_api.models.cached.clubs import ClubCache
 from mitblr_club_api.models.cached.events import EventCache
 from mitblr_club_api.models.cached.team import TeamCache
-from mitblr_club_api.models.internal.students import Student
+from mitblr_club_api.models.cached.students import StudentCache, StudentProfile
+from mitblr_club_api.utils.diskstore import DiskStore
+from mitblr_club_api.utils.invalidation import Invalidation, InvalidationBus
+from mitblr_club_api.utils.caches import (
+    EvictingTTLCache,
+    MultiKeyTTLCache,
+    SoftTTLCache,
+    SortedPartition,
+    SortedSoftTTLCache,
+    TaggedTTLCache,
+)
+from mitblr_club_api.utils.metrics import CacheMetrics
+from mitblr_club_api.utils.shared import SharedSegment
+from mitblr_club_api.utils.singleflight import SingleFlight
+from mitblr_club_api.utils.sketch import FrequencySketch
+from mitblr_club_api.utils.sizing import approximate_size
+from mitblr_club_api.utils.snapshot import read_snapshot, write_snapshot
+
+# Overlap applied to refresh watermarks, to account for clock skew between writers.
+WATERMARK_OVERLAP = timedelta(seconds=30)
+
+# Number of incremental refreshes after which every document is read again.
+FULL_SYNC_INTERVAL = 30
+
+# Version of the layout of cache snapshots, to be incremented whenever the cached records change.
+SNAPSHOT_VERSION = 1
+
+# Seconds a follower waits at startup for the leader to publish the shared caches, before loading them
+# itself.
+SHARED_STARTUP_WAIT = 10
+
+# Default memory budgets of the caches, in bytes.
+DEFAULT_BUDGETS = {
+    "student": 32 * 1024 * 1024,
+    "team": 4 * 1024 * 1024,
+    "club": 4 * 1024 * 1024,
+    "event": math.inf,
+    "event_history": 16 * 1024 * 1024,
+    "query": 4 * 1024 * 1024,
+}
+
+# Seconds students are kept in memory.
+STUDENT_TTL = 3600
+
+# Number of past sort years date range queries may span, older sort years are never loaded.
+MAX_PAST_YEARS = 5
+
+
+def _as_utc(date: datetime) -> datetime:
+    """Converts a datetime to a naive UTC datetime, as stored by MongoDB, so that dates can be compared."""
+
+    if date.tzinfo is None:
+        return date
+
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _event_date(event: EventCache) -> datetime:
+    """Sort key of the event cache."""
+
+    return _as_utc(event.date)
+
+
+def _event_club(event: EventCache) -> str:
+    """Group key of the event cache."""
+
+    return event.club.value
 
 
 class Cache:
-    def __init__(self, db: AsyncIOMotorDatabase, sort_year: int):
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        sort_year: int,
+        soft_ttl: float = 3 * 3600,
+        hard_ttl: float = 6 * 3600,
+        budgets: Optional[dict[str, float]] = None,
+        shared: Optional[SharedSegment] = None,
+        l2: Optional[DiskStore] = None,
+        l2_ttl: float = 24 * 3600,
+        bus: Optional[InvalidationBus] = None,
+        query_ttl: float = 300,
+    ):
         self.db = db
         self.sort_year = sort_year
+        self.shared = shared
+        self.l2 = l2
+        self.l2_ttl = l2_ttl
+        # Without a bus, the writes of other hosts never reach the L2 store, so students are kept there no
+        # longer than in memory. Events and teams are refreshed from the database anyway.
+        self.l2_student_ttl = l2_ttl if bus is not None else min(l2_ttl, STUDENT_TTL)
+        self.bus = bus
 
-        self._student_cache: TTLCache = TTLCache(maxsize=200, ttl=3600)
-        self._team_cache: TTLCache = TTLCache(maxsize=100, ttl=2.5 * 3600)
-        self._club_cache: TTLCache = TTLCache(maxsize=100, ttl=3.5 * 3600)
-        self._event_cache: TTLCache = TTLCache(maxsize=25, ttl=3.5 * 3600)
+        self.metrics: dict[str, CacheMetrics] = {
+            name: CacheMetrics()
+            for name in (
+                "student",
+                "team",
+                "club",
+                "event",
+                "event_history",
+                "query",
+                "missing",
+                "l2",
+            )
+        }
 
-        # Note - Club and Events are Cached for 3.5h but refreshed every 3h
+        # Memory budgets (in bytes) of the caches. Entries are weighed by their approximate size, and
+        # caches with a finite budget only admit new entries which are used more often than the entries
+        # they would evict.
+        budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
 
-    async def get_student(self, student_id: Union[str, int]) -> Optional[Student]:
-        """Get the student from the cache (by UUID)."""
+        def sizing(name: str) -> dict[str, Any]:
+            budget = budgets[name]
 
-        student = self._student_cache.get(student_id)
+            return {
+                "maxsize": budget,
+                "getsizeof": approximate_size,
+                "metrics": self.metrics[name],
+                "sketch": None
+                if math.isinf(budget)
+                else FrequencySketch(width=max(1024, int(budget) // 512)),
+            }
 
-        if student:
-            logger.debug(f"Cache Hit - Student - {student_id}")
-        else:
-            # Try to convert the student_id to an integer
-            try:
-                student_id = int(student_id)
-                student_doc = await self.db["students"].find_one(
-                    {
-                        "$or": [
-                            {"application_number": student_id},
-                            {"registration_number": student_id},
-                        ]
-                    }
-                )
+        # Students are stored once by ObjectId and are reachable through their application number,
+        # registration number and email.
+        self._student_cache = MultiKeyTTLCache(ttl=STUDENT_TTL, **sizing("student"))
+        self._team_cache = SoftTTLCache(
+            ttl=2.5 * 3600, soft_ttl=2.5 * 3600, **sizing("team")
+        )
+        self._club_cache = SoftTTLCache(
+            ttl=hard_ttl, soft_ttl=soft_ttl, **sizing("club")
+        )
+        # Events are not bounded by default, every event of the sort year is kept (ordered by date) to
+        # serve date range queries without scanning.
+        self._event_cache = SortedSoftTTLCache(
+            ttl=hard_ttl,
+            soft_ttl=soft_ttl,
+            sort_key=_event_date,
+            group_key=_event_club,
+            **sizing("event"),
+        )
+        # Events of past sort years are loaded on demand, a whole year at a time, and evicted as a whole.
+        self._event_history = EvictingTTLCache(ttl=hard_ttl, **sizing("event_history"))
 
-            except ValueError:
-                student_doc = await self.db["students"].find_one(
-                    {"email": student_id.lower()}
-                )
+        # Results of queries run through `find` and `find_one`, stored as BSON and dropped by tag on writes.
+        self._query_cache = TaggedTTLCache(ttl=query_ttl, **sizing("query"))
 
-            if student_doc:
-                logger.debug(f"Cache Miss - Student - {student_id}")
-                student = Student(**student_doc)
-                self._student_cache[student.email] = student
-            else:
-                return None
+        # Note - Clubs, events and teams are refreshed every minute. Past the soft TTL an entry is still
+        # served while it is refreshed in the background, only past the hard TTL does a request wait on the
+        # database.
+        # Setting soft_ttl equal to hard_ttl disables serving stale entries.
+        self._revalidations: set[asyncio.Task] = set()
+
+        # Caches refreshed from whole collections: the cache, how to build its records, and the field of
+        # the documents the records are keyed by.
+        self._collections: dict[
+            str, tuple[SoftTTLCache, Callable[[dict], Any], str]
+        ] = {
+            "clubs": (self._club_cache, ClubCache.from_document, "slug"),
+            "events": (self._event_cache, EventCache.from_document, "slug"),
+            "club_teams": (self._team_cache, TeamCache.from_document, "_id"),
+        }
+
+        # Entities of the refreshed collections, and those whose records are also kept in the L2 store.
+        self._entities: dict[str, str] = {
+            "clubs": "club",
+            "events": "event",
+            "club_teams": "team",
+        }
+        self._l2_entities: dict[str, str] = {"events": "event", "club_teams": "team"}
+
+        # Per collection watermarks of the incremental refreshes.
+        self._watermarks: dict[str, dict[str, Any]] = {}
+
+        # With a shared segment, the generation of the caches last published or loaded, and the number of
+        # refreshes since.
+        self._shared_generation = 0
+        self._unpublished_refreshes = 0
+
+        # Keys which were recently looked up but do not exist, so repeated lookups of unknown students,
+        # clubs and events do not each hit the database. Creating the entity forgets its keys.
+        self._missing_cache = EvictingTTLCache(
+            maxsize=1000, ttl=60, metrics=self.metrics["missing"]
+        )
+
+        # Concurrent misses for the same key share a single database round trip.
+        self._flights = SingleFlight()
+
+        # Writes to the L2 store happen in the background, they are kept here until they are done.
+        self._l2_writes: set[asyncio.Task] = set()
+
+        # Writes applied to the caches are published to the other instances and workers, which evict or
+        # reload their copies.
+        if bus is not None:
+            bus.subscribe(self.apply_invalidation)
+
+    async def get_student(
+        self,
+        student_id: Union[str, int],
+        profile: StudentProfile = StudentProfile.IDENTITY,
+    ) -> Optional[StudentCache]:
+        """
+        Get the student from the cache (by UUID), with at least the fields of `profile`.
+
+        Students are cached with the fields they were looked up for, a student cached with a lower profile
+        is loaded again with the fields asked for.
+        """
+
+        key = self._student_key(student_id)
+        student = self._student_cache.lookup(key)
+
+        if student is not None and student.profile >= profile:
+            logger.debug("Cache Hit - Student - %s", student_id)
+            self.metrics["student"].hits += 1
+            return student
+
+        self.metrics["student"].misses += 1
+
+        # A student cached with a lower profile exists.
+        if student is None and self._is_missing("student", key):
+            logger.debug("Cache Hit - Missing Student - %s", student_id)
+            return None
+
+        logger.debug("Cache Miss - Student - %s (%s)", student_id, profile.name)
+        return await self._flights.do(
+            "student", (key, profile), lambda: self._load_student(key, profile)
+        )
+
+    async def _load_student(
+        self, key: Union[int, str], profile: StudentProfile
+    ) -> Optional[StudentCache]:
+        """Loads the student from the L2 store, or else from the database."""
 
+        student = await self._from_l2("student", key, StudentCache.from_document)
+
+        if student is None or student.profile < profile:
+            return await self.fetch_student(key, profile)
+
+        self._cache_student(student, persist=False)
         return student
 
-    async def fetch_student(self, student_id: Union[int, str]) -> Optional[Student]:
-        """Fetch the student from the database (by UUID) and saves to cache."""
+    async def fetch_student(
+        self,
+        student_id: Union[int, str],
+        profile: StudentProfile = StudentProfile.IDENTITY,
+    ) -> Optional[StudentCache]:
+        """Fetch the fields of `profile` of the student from the database (by UUID) and saves to cache."""
 
-        # Try to convert the student_id to an integer
-        try:
-            student_id = int(student_id)
-            student_doc = await self.db["students"].find_one(
-                {
-                    "$or": [
-                        {"application_number": student_id},
-                        {"registration_number": student_id},
-                    ]
-                }
-            )
+        key = self._student_key(student_id)
 
-        except ValueError:
+        if isinstance(key, int):
+            query = {"$or": [{"application_number": key}, {"registration_number": key}]}
+        elif ObjectId.is_valid(key):
+            query = {"_id": ObjectId(key)}
+        else:
+            query = {"email": key}
+
+        with self.metrics["student"].time_load():
             student_doc = await self.db["students"].find_one(
-                {"email": student_id.lower()}
+                query, profile.projection(self.sort_year)
             )
 
         if student_doc:
-            student = Student(**student_doc)
-
-            self._student_cache[student.email] = student
+            student = StudentCache.from_document(student_doc)
+            self._cache_student(student)
             return student
 
+        self._missing_cache[("student", key)] = True
         return None
 
+    def _is_missing(self, entity: str, key: Hashable) -> bool:
+        """Checks if the key of an entity was recently looked up and not found."""
+
+        if (entity, key) in self._missing_cache:
+            self.metrics["missing"].hits += 1
+            return True
+
+        self.metrics["missing"].misses += 1
+        return False
+
+    def forget_missing_student(self, *student_ids: Union[int, str]):
+        """Forgets that the student (by any UUID) was not found, to be called once it has been created."""
+
+        for student_id in student_ids:
+            key = self._student_key(student_id)
+
+            self._missing_cache.pop(("student", key), None)
+            self._written("student", key)
+
+    def _cache_student(self, student: StudentCache, persist: bool = True):
+        """Saves the student to the cache (and the L2 store, if `persist`) under all of its UUIDs."""
+
+        aliases = (
+            student.application_number,
+            student.registration_number,
+            student.email.lower(),
+        )
+
+        self._student_cache.store(str(student.id), student, aliases)
+
+        if persist:
+            self._to_l2("student", str(student.id), student, aliases)
+
+    def evict_student(self, student_id: Union[int, str]):
+        """Evicts the student (by any UUID) from the cache, along with all of its aliases."""
+
+        key = self._student_key(student_id)
+
+        self._student_cache.discard(key)
+        self._drop_from_l2("student", key)
+        self._written("student", key)
+
+    @staticmethod
+    def _student_key(student_id: Union[int, str]) -> Union[int, str]:
+        """Normalises a student UUID into the key used by the student cache."""
+
+        # Application and registration numbers are integers, everything else is a string.
+        try:
+            return int(student_id)
+        except ValueError:
+            return student_id.lower()
+
     async def get_team(self, team_id: str) -> Optional[TeamCache]:
         """Get the team from the cache (by Team ID)."""
 
-        team = self._team_cache.get(team_id)
+        team = self._team_cache.get(ObjectId(team_id))
 
         if team:
-            logger.debug(f"Cache Hit - Team - {team_id}")
-        else:
-            team_doc = await self.db["club_teams"].find_one({"_id": ObjectId(team_id)})
+            logger.debug("Cache Hit - Team - %s", team_id)
+            self.metrics["team"].hits += 1
+            return team
 
-            if team_doc:
-                logger.debug(f"Cache Miss - Team - {team_id}")
-                team = TeamCache(**team_doc)
-                self._team_cache[team_id] = team
-            else:
-                return None
+        self.metrics["team"].misses += 1
+
+        logger.debug("Cache Miss - Team - %s", team_id)
+        return await self._flights.do("team", team_id, lambda: self._load_team(team_id))
+
+    def team_version(self, team_id: str) -> Optional[int]:
+        """Get the permission version of a team, if it is cached in memory, without loading it."""
 
+        team = self._team_cache.get(ObjectId(team_id))
+        return None if team is None else team.perm_version
+
+    async def _load_team(self, team_id: str) -> Optional[TeamCache]:
+        """Loads the team from the L2 store, or else from the database."""
+
+        team = await self._from_l2("team", ObjectId(team_id), TeamCache.from_document)
+
+        if team is None:
+            return await self.fetch_team(team_id)
+
+        self._team_cache[team.id] = team
         return team
 
     async def fetch_team(self, team_id: str) -> Optional[TeamCache]:
         """Fetches the team from the database (by Team ID) and saves to cache."""
 
-        team_doc = await self.db["club_teams"].find_one({"_id": ObjectId(team_id)})
+        with self.metrics["team"].time_load():
+            team_doc = await self.db["club_teams"].find_one({"_id": ObjectId(team_id)})
 
         if team_doc:
-            team = TeamCache(**team_doc)
-            self._team_cache[team_id] = team
+            team = TeamCache.from_document(team_doc)
+            self._team_cache[team.id] = team
+            self._to_l2("team", team.id, team)
             return team
 
+        self._drop_from_l2("team", ObjectId(team_id))
         return None
 
+    def evict_team(self, team_id: str):
+        """Evicts the team (by Team ID) from the cache, to be called once it has been changed."""
+
+        self._team_cache.pop(ObjectId(team_id), None)
+        self._drop_from_l2("team", ObjectId(team_id))
+        self._written("team", team_id)
+
     async def get_club(self, club_id: str) -> Optional[ClubCache]:
         """Get the club from the cache (by Slug)."""
 
         club = self._club_cache.get(club_id)
 
         if club:
-            logger.debug(f"Cache Hit - Club - {club_id}")
-        else:
-            club_doc = await self.db["clubs"].find_one({"slug": club_id})
+            logger.debug("Cache Hit - Club - %s", club_id)
+            self.metrics["club"].hits += 1
 
-            if club_doc:
-                logger.debug(f"Cache Miss - Club - {club_id}")
-                club = ClubCache(**club_doc)
-                self._club_cache[club_id] = club
-            else:
-                return None
+            if self._club_cache.is_stale(club_id):
+                self._revalidate("club", club_id, lambda: self.fetch_club(club_id))
+
+            return club
+
+        self.metrics["club"].misses += 1
+
+        if self._is_missing("club", club_id):
+            logger.debug("Cache Hit - Missing Club - %s", club_id)
+            return None
 
-        return club
+        logger.debug("Cache Miss - Club - %s", club_id)
+        return await self._flights.do("club", club_id, lambda: self.fetch_club(club_id))
 
     def get_clubs(self) -> list[ClubCache]:
         """Get all clubs from the cache."""
@@ -146,45 +423,74 @@ class Cache:
     async def fetch_club(self, club_id: str) -> Optional[ClubCache]:
         """Fetches the club from the cache (by Slug) and saves to cache."""
 
-        club_doc = await self.db["clubs"].find_one({"slug": club_id})
+        with self.metrics["club"].time_load():
+            club_doc = await self.db["clubs"].find_one({"slug": club_id})
 
         if club_doc:
-            club = ClubCache(**club_doc)
+            club = ClubCache.from_document(club_doc)
             self._club_cache[club_id] = club
             return club
 
+        # The club does not exist (anymore), stop serving it.
+        self._club_cache.pop(club_id, None)
+        self._missing_cache[("club", club_id)] = True
         return None
 
-    async def refresh_clubs(self):
-        """Refreshes the cache of clubs."""
+    def forget_missing_club(self, club_id: str):
+        """Forgets that the club (by Slug) was not found, to be called once it has been created."""
+
+        self._missing_cache.pop(("club", club_id), None)
+        self._written("club", club_id)
 
-        clubs = await self.db["clubs"].find({}).to_list(length=1000)
+    async def refresh_clubs(self) -> bool:
+        """Refreshes the cache of clubs with the clubs changed since the last refresh."""
 
-        for club in clubs:
-            self._club_cache[club["slug"]] = ClubCache(**club)
+        return await self._refresh_collection("clubs", {})
 
     async def get_event(self, event_id: str, year: int = None) -> Optional[EventCache]:
-        """Get the event from the cache (by Slug)."""
+        """Get the event from the cache (by Slug), of the sort year by default or else of `year`."""
         if year is None:
             year = self.sort_year
 
+        if str(year) != str(self.sort_year):
+            partition = await self.get_event_partition(year)
+            return partition.get(event_id)
+
         event = self._event_cache.get(event_id)
 
         if event:
-            logger.debug(f"Cache Hit - Event - {event_id}")
-        else:
-            event_doc = await self.db["events"].find_one(
-                {"$and": [{"slug": event_id}, {"sort_year": str(year)}]}
-            )
+            logger.debug("Cache Hit - Event - %s", event_id)
+            self.metrics["event"].hits += 1
 
-            if event_doc:
-                logger.debug(f"Cache Miss - Event - {event_id}")
-                event_doc["id"] = event_doc["_id"]
-                event = EventCache(**event_doc)
-                self._event_cache[event_id] = event
-            else:
-                return None
+            if self._event_cache.is_stale(event_id):
+                self._revalidate(
+                    "event", (event_id, year), lambda: self.fetch_event(event_id, year)
+                )
 
+            return event
+
+        self.metrics["event"].misses += 1
+
+        if self._is_missing("event", (event_id, str(year))):
+            logger.debug("Cache Hit - Missing Event - %s", event_id)
+            return None
+
+        logger.debug("Cache Miss - Event - %s", event_id)
+        return await self._flights.do(
+            "event", (event_id, year), lambda: self._load_event(event_id, year)
+        )
+
+    async def _load_event(self, event_id: str, year: int) -> Optional[EventCache]:
+        """Loads the event from the L2 store, or else from the database."""
+
+        event = await self._from_l2(
+            "event", event_id, EventCache.from_document, year=year
+        )
+
+        if event is None:
+            return await self.fetch_event(event_id, year)
+
+        self._event_cache[event_id] = event
         return event
 
     async def fetch_event(
@@ -194,26 +500,544 @@ class Cache:
         if year is None:
             year = self.sort_year
 
-        event_doc = await self.db["events"].find_one(
-            {"$and": [{"slug": event_id}, {"sort_year": str(year)}]}
-        )
+        if str(year) != str(self.sort_year):
+            # Past years are only ever loaded as a whole.
+            self._event_history.pop(str(year), None)
+            partition = await self.get_event_partition(year)
+            return partition.get(event_id)
+
+        with self.metrics["event"].time_load():
+            event_doc = await self.db["events"].find_one(
+                {"$and": [{"slug": event_id}, {"sort_year": str(year)}]}
+            )
 
         if event_doc:
-            event = EventCache(**event_doc)
+            event = EventCache.from_document(event_doc)
             self._event_cache[event_id] = event
+            self._to_l2("event", event_id, event, year=year)
             return event
 
+        # The event does not exist (anymore), stop serving it.
+        self._event_cache.pop(event_id, None)
+        self._drop_from_l2("event", event_id, year=year)
+        self._missing_cache[("event", (event_id, str(year)))] = True
         return None
 
-    async def refresh_events(self):
-        """Refreshes the event cache."""
-        year = self.sort_year
-        events = await self.db["events"].find({"sort_year": str(year)}).to_list(1000)
+    def forget_missing_event(self, event_id: str, year: int = None):
+        """Forgets that the event (by Slug) was not found, to be called once it has been created."""
+        if year is None:
+            year = self.sort_year
+
+        self._missing_cache.pop(("event", (event_id, str(year))), None)
+        self._event_history.pop(str(year), None)
+        self._written("event", event_id, year)
+
+    async def get_event_partition(self, year: Union[str, int]) -> SortedPartition:
+        """Get all the events of a past sort year, loading them at once if they are not cached."""
+
+        year = str(year)
+        partition = self._event_history.get(year)
+
+        if partition is not None:
+            logger.debug("Cache Hit - Event History - %s", year)
+            self.metrics["event_history"].hits += 1
+            return partition
+
+        self.metrics["event_history"].misses += 1
+
+        logger.debug("Cache Miss - Event History - %s", year)
+        return await self._flights.do(
+            "event_history", year, lambda: self._load_event_partition(year)
+        )
+
+    async def _load_event_partition(self, year: str) -> SortedPartition:
+        """Loads all the events of a sort year from the database, and saves them to cache."""
+
+        events = []
+
+        with self.metrics["event_history"].time_load():
+            async for doc in self.db["events"].find(
+                {"sort_year": year, "deleted": {"$ne": True}}
+            ):
+                try:
+                    events.append(EventCache.from_document(doc))
+                except (KeyError, ValueError) as error:
+                    logger.warning(
+                        f"Skipping invalid document events/{doc['_id']}: {error}"
+                    )
+
+        partition = SortedPartition(
+            ((event.slug, event) for event in events),
+            sort_key=_event_date,
+            group_key=_event_club,
+        )
+
+        self._event_history[year] = partition
+
+        size = self._event_history.getsizeof(partition)
+        if size > self._event_history.maxsize:
+            # Never admitted, every request spanning the year loads it again.
+            logger.warning(
+                "Events of %s (%s bytes) exceed the event history budget, raise CACHE_EVENT_HISTORY_MB",
+                year,
+                size,
+            )
+
+        return partition
+
+    async def refresh_events(self) -> bool:
+        """Refreshes the event cache with the events changed since the last refresh."""
+
+        return await self._refresh_collection(
+            "events", {"sort_year": str(self.sort_year)}
+        )
+
+    async def refresh_teams(self) -> bool:
+        """Refreshes the team cache with the teams changed since the last refresh."""
+
+        # Teams without API access are refreshed too, so a team losing its API access is seen.
+        return await self._refresh_collection("club_teams", {})
+
+    async def refresh(self):
+        """
+        Refreshes the clubs, events and teams, to be called periodically.
+
+        With a shared segment, only the leader refreshes from the database, and publishes the caches to the
+        other workers. The other workers load what the leader published, and
+        only fall back to refreshing from the database if the leader does not publish.
+        """
+
+        if self.shared is None:
+            await self.refresh_events()
+            await self.refresh_clubs()
+            await self.refresh_teams()
+        elif self.shared.acquire_leadership():
+            await self._lead()
+        else:
+            await self._follow()
+
+        if self.l2 is not None:
+            await self.l2.purge()
+
+    async def _lead(self):
+        """Refreshes the caches and publishes them to the other workers if they changed."""
+
+        if self._unpublished_refreshes == 0 and self._shared_generation == 0:
+            # Newly elected, carry on from what the previous leader published.
+            await self._load_shared()
+
+        changed = await self.refresh_events()
+        changed = await self.refresh_clubs() or changed
+        changed = await self.refresh_teams() or changed
+
+        self._unpublished_refreshes += 1
+
+        # The caches are published now and then even if they did not change, so the entries of the other
+        # workers do not go stale.
+        if (
+            changed
+            or self._shared_generation == 0
+            or self._unpublished_refreshes >= FULL_SYNC_INTERVAL
+        ):
+            try:
+                self._shared_generation = self.shared.publish(
+                    SNAPSHOT_VERSION, self._dump()
+                )
+            except ValueError as error:
+                logger.warning(f"Cache Shared - Failed to publish: {error}")
+                return
+
+            self._unpublished_refreshes = 0
+            logger.debug(
+                "Cache Shared - Published generation %s", self._shared_generation
+            )
+
+    async def _follow(self):
+        """Loads the caches published by the leader, or refreshes them itself if the leader does not."""
+
+        if self._shared_generation == 0:
+            # The leader is likely starting at the same time, give it a chance to publish first.
+            for _ in range(SHARED_STARTUP_WAIT * 10):
+                generation = self.shared.generation
+
+                if generation != 0 and generation % 2 == 0:
+                    break
+
+                await asyncio.sleep(0.1)
+
+        if await self._load_shared():
+            self._unpublished_refreshes = 0
+            return
+
+        self._unpublished_refreshes += 1
+
+        if (
+            self._shared_generation == 0
+            or self._unpublished_refreshes > 2 * FULL_SYNC_INTERVAL
+        ):
+            logger.warning("Cache Shared - Nothing published by the leader, refreshing")
+
+            await self.refresh_events()
+            await self.refresh_clubs()
+            await self.refresh_teams()
+
+    async def _load_shared(self) -> bool:
+        """
+        Loads the caches from the shared segment, if they were published since they were last loaded.
+
+        The snapshot is decoded and its records are built in threads, only replacing the contents of the
+        caches happens on the event loop.
+        """
+
+        try:
+            published = await self.shared.read(
+                SNAPSHOT_VERSION, since=self._shared_generation
+            )
+        except ValueError as error:
+            logger.warning(f"Cache Shared - Failed to load: {error}")
+            return False
+
+        if published is None:
+            return False
+
+        generation, snapshot = published
+        records = await asyncio.get_running_loop().run_in_executor(
+            None, self._build_records, snapshot
+        )
+
+        if not self._apply_snapshot(snapshot, records, reconcile=False):
+            return False
+
+        self._shared_generation = generation
+        logger.debug("Cache Shared - Loaded generation %s", generation)
+        return True
+
+    async def _refresh_collection(self, collection: str, query: dict) -> bool:
+        """
+        Incrementally refreshes a cache from a collection, returns True if the cache changed.
+
+        The first refresh streams every document matching `query`. Later refreshes only stream the
+        documents inserted or updated (through their `updated_at` field) since the previous refresh's
+        watermark. Tombstoned documents (`deleted: true`) are evicted. Every `FULL_SYNC_INTERVAL` refreshes,
+        and after the cache was loaded from a snapshot, every document is streamed again, to evict the
+        documents that were deleted outright and reload those changed without setting `updated_at`.
+        """
+
+        cache, build, key_field = self._collections[collection]
+        entity = self._entities[collection]
+        l2_entity = self._l2_entities.get(collection)
+        watermark = self._watermarks.get(collection)
+
+        if watermark is None:
+            watermark = {"updated_at": None, "inserted_at": None, "refreshes": 0}
+
+        refreshes = watermark["refreshes"] + 1
+
+        # Every document is read on the first refresh, and again every so often and right after the cache was
+        # loaded from a snapshot.
+        sweep = (
+            refreshes == 1
+            or watermark.get("reconcile", False)
+            or refreshes % FULL_SYNC_INTERVAL == 0
+        )
+
+        if sweep:
+            changed = query
+        else:
+            # Writers on other instances may lag slightly, so the watermark is taken with some overlap.
+            inserted_since = watermark["inserted_at"] - WATERMARK_OVERLAP
+            since = [{"_id": {"$gt": ObjectId.from_datetime(inserted_since)}}]
+
+            if watermark["updated_at"] is not None:
+                updated_since = watermark["updated_at"] - WATERMARK_OVERLAP
+                since.append({"updated_at": {"$gte": updated_since}})
+
+            changed = {"$and": [query, {"$or": since}]}
+
+        # The watermark only moves forward once the refresh has succeeded.
+        updated_at, inserted_at = watermark["updated_at"], watermark["inserted_at"]
+        seen, changes, modified = set(), 0, False
+        saved, dropped = [], []
+
+        async for doc in self.db[collection].find(changed):
+            key = doc[key_field]
+            seen.add(key)
+            changes += 1
+
+            doc_inserted_at = doc["_id"].generation_time.replace(tzinfo=None)
+            if inserted_at is None or doc_inserted_at > inserted_at:
+                inserted_at = doc_inserted_at
+
+            doc_updated_at = doc.get("updated_at")
+            if doc_updated_at is not None and (
+                updated_at is None or doc_updated_at > updated_at
+            ):
+                updated_at = doc_updated_at
+
+            if doc.get("deleted", False):
+                modified = cache.pop(key, None) is not None or modified
+                dropped.append(key)
+                continue
+
+            try:
+                record = build(doc)
+            except (KeyError, ValueError) as error:
+                logger.warning(f"Skipping invalid document {collection}/{key}: {error}")
+                continue
+
+            # Documents within the overlap of the watermark are seen again, unchanged.
+            if key not in cache or cache[key] != record:
+                modified = True
+                saved.append((key, record))
+
+            cache[key] = record
+
+        # Every document not seen by a sweep was deleted outright.
+        if sweep:
+            for key in set(cache.keys()) - seen:
+                modified = cache.pop(key, None) is not None or modified
+                dropped.append(key)
+
+        # Query results derived from the changed documents are dropped too.
+        for key in (*(key for key, _ in saved), *dropped):
+            self._query_cache.invalidate(f"{entity}:{key}")
+
+        if l2_entity is not None:
+            self._sync_l2(l2_entity, saved, dropped, retained=seen if sweep else None)
+
+        # Everything still cached is now known to be current, documents changed without setting `updated_at`
+        # are reloaded by the next sweep.
+        cache.touch()
+
+        self._watermarks[collection] = {
+            "updated_at": updated_at,
+            "inserted_at": inserted_at or datetime.utcnow(),
+            "refreshes": refreshes,
+        }
+
+        logger.debug("Cache Refresh - %s - %s changed", collection, changes)
+        return modified
+
+    def save_snapshot(self, path: str):
+        """
+        Writes the refreshed caches (clubs, events, and teams when shared), along with their refresh
+        watermarks, to a snapshot file.
+
+        Students are not included, they are loaded on demand and may have been changed by other instances
+        in the meantime.
+        """
+
+        size = write_snapshot(path, SNAPSHOT_VERSION, self._dump())
+        logger.info("Cache Snapshot - Saved %s bytes to %s", size, path)
+
+    def load_snapshot(self, path: str, max_age: Optional[timedelta] = None) -> bool:
+        """
+        Loads the caches from a snapshot file written by :meth:`save_snapshot`.
+
+        The watermarks are restored too, so the next refreshes only fetch what changed since the snapshot
+        was taken, and look for deleted documents. Snapshots older than `max_age` (by default the hard TTL
+        of the caches), of another version or of another sort year are ignored.
+
+        Returns True if the snapshot was loaded, else False.
+        """
+
+        if max_age is None:
+            max_age = timedelta(seconds=self._club_cache.ttl)
+
+        try:
+            snapshot = read_snapshot(path, SNAPSHOT_VERSION)
+        except FileNotFoundError:
+            logger.info("Cache Snapshot - None found at %s", path)
+            return False
+        except (OSError, ValueError) as error:
+            logger.warning(f"Cache Snapshot - Ignoring {path}: {error}")
+            return False
+
+        if datetime.utcnow() - snapshot["saved_at"] > max_age:
+            logger.info("Cache Snapshot - Ignoring %s, it is too old", path)
+            return False
+
+        if not self._restore(snapshot, reconcile=True):
+            return False
+
+        logger.info("Cache Snapshot - Loaded %s", path)
+        return True
+
+    def _dump(self) -> dict:
+        """Dumps the caches refreshed at least once, along with their watermarks, into a snapshot."""
+
+        snapshot = {
+            "saved_at": datetime.utcnow(),
+            "sort_year": str(self.sort_year),
+            "collections": {},
+        }
+
+        for collection, (cache, _, _) in self._collections.items():
+            watermark = self._watermarks.get(collection)
+
+            if watermark is None:
+                continue
+
+            cache.expire()
+            snapshot["collections"][collection] = {
+                "watermark": {
+                    "updated_at": watermark["updated_at"],
+                    "inserted_at": watermark["inserted_at"],
+                },
+                "documents": [record.to_document() for record in cache.values()],
+            }
+
+        return snapshot
+
+    def _restore(self, snapshot: dict, reconcile: bool) -> bool:
+        """
+        Replaces the contents and watermarks of the caches with those of a snapshot. With `reconcile`, the
+        next refreshes look for deleted documents.
+
+        Returns False, leaving the caches untouched, if the snapshot is of another sort year.
+        """
+
+        return self._apply_snapshot(snapshot, self._build_records(snapshot), reconcile)
+
+    def _build_records(self, snapshot: dict) -> dict[str, dict[Any, Any]]:
+        """Builds the records of the documents of a snapshot, by collection and key, outside the caches."""
+
+        records = {}
+
+        for collection, saved in snapshot["collections"].items():
+            if collection not in self._collections:
+                continue
+
+            _, build, key_field = self._collections[collection]
+            records[collection] = {}
+
+            for document in saved["documents"]:
+                try:
+                    records[collection][document[key_field]] = build(document)
+                except (KeyError, ValueError) as error:
+                    logger.warning(
+                        f"Cache Snapshot - Skipping invalid {collection}: {error}"
+                    )
 
-        for event_doc in events:
-            # Renaming _id to id else pydantic will throw an error on trying to get the id field later.
-            event_doc["id"] = event_doc["_id"]
-            self._event_cache[event_doc["slug"]] = EventCache(**event_doc)
+        return records
+
+    def _apply_snapshot(
+        self, snapshot: dict, records: dict[str, dict[Any, Any]], reconcile: bool
+    ) -> bool:
+        """Replaces the contents and watermarks of the caches with the records built from a snapshot."""
+
+        if snapshot["sort_year"] != str(self.sort_year):
+            logger.info("Cache Snapshot - Ignoring a snapshot of another sort year")
+            return False
+
+        for collection, saved in snapshot["collections"].items():
+            if collection not in records:
+                continue
+
+            cache = self._collections[collection][0]
+
+            for key, record in records[collection].items():
+                cache[key] = record
+
+            for key in set(cache.keys()) - records[collection].keys():
+                cache.pop(key, None)
+
+            self._watermarks[collection] = {
+                **saved["watermark"],
+                "refreshes": 0,
+                "reconcile": reconcile,
+            }
+
+        return True
+
+    async def find_one(
+        self,
+        collection: str,
+        query: dict,
+        projection: Optional[dict] = None,
+        tags: Union[Iterable[str], Callable[[list[dict]], Iterable[str]]] = (),
+    ) -> Optional[dict]:
+        """Finds the first document matching `query` through the query cache, see :meth:`find`."""
+
+        documents = await self.find(collection, query, projection, tags, length=1)
+        return documents[0] if documents else None
+
+    async def find(
+        self,
+        collection: str,
+        query: dict,
+        projection: Optional[dict] = None,
+        tags: Union[Iterable[str], Callable[[list[dict]], Iterable[str]]] = (),
+        length: Optional[int] = None,
+    ) -> list[dict]:
+        """
+        Finds the documents matching `query` through the query cache.
+
+        Results are cached by collection, query, projection and length, along with `tags` naming the
+        entities they were read from (such as `club:<slug>` or `student:<id>`), or a callable deriving the
+        tags from the documents found. Writes drop the results through their tags, see :meth:`invalidate`.
+        Every caller gets its own copy of the documents.
+        """
+
+        key = bson.encode(
+            {
+                "collection": collection,
+                "query": query,
+                "projection": projection,
+                "length": length,
+            }
+        )
+
+        result = self._query_cache.get(key)
+
+        if result is not None:
+            logger.debug("Cache Hit - Query - %s", collection)
+            self.metrics["query"].hits += 1
+        else:
+            self.metrics["query"].misses += 1
+
+            logger.debug("Cache Miss - Query - %s", collection)
+            result = await self._flights.do(
+                "query",
+                key,
+                lambda: self._load_query(
+                    collection, query, projection, tags, length, key
+                ),
+            )
+
+        return bson.decode(result)["documents"]
+
+    async def _load_query(
+        self,
+        collection: str,
+        query: dict,
+        projection: Optional[dict],
+        tags: Union[Iterable[str], Callable[[list[dict]], Iterable[str]]],
+        length: Optional[int],
+        key: bytes,
+    ) -> bytes:
+        """Runs a query and caches its result, encoded as BSON."""
+
+        with self.metrics["query"].time_load():
+            documents = (
+                await self.db[collection].find(query, projection).to_list(length=length)
+            )
+
+        if callable(tags):
+            tags = tags(documents)
+
+        result = bson.encode({"documents": documents})
+        self._query_cache.store(key, result, tags)
+        return result
+
+    def invalidate(self, *tags: str):
+        """Drops the query results carrying any of the tags, on every instance and worker."""
+
+        for tag in tags:
+            self._query_cache.invalidate(tag)
+
+            if self.bus is not None:
+                self.bus.publish("tag", tag)
 
     async def get_event_by_timedelta(
         self, delta: int = 7
@@ -225,10 +1049,385 @@ class Cache:
         )
         end_date = start_date + timedelta(days=delta)
 
-        data = []
-
-        for event in self._event_cache.values():
-            if start_date <= event.date <= end_date:
-                data.append(event)
+        data = await self.get_events_between(start_date, end_date)
 
         return None if len(data) == 0 else data
+
+    async def get_events_between(
+        self, start: datetime, end: datetime, clubs: Optional[Iterable[str]] = None
+    ) -> list[EventCache]:
+        """
+        Returns the events, ordered by date, within [start, end) and optionally of the given clubs.
+
+        Windows starting before the first event of the sort year also span the past sort years that may
+        overlap them, which are loaded as a whole. Events of sort year `Y` are assumed to be dated in the
+        calendar years `Y` or `Y + 1`. At most `MAX_PAST_YEARS` past sort years are spanned.
+        """
+
+        start, end = _as_utc(start), _as_utc(end)
+        groups = None if clubs is None else set(clubs)
+
+        events = self._event_cache.between(start, end, groups=groups)
+        first = self._event_cache.first()
+
+        if first is not None and _event_date(first) <= start:
+            return events
+
+        first_year = max(start.year - 1, int(self.sort_year) - MAX_PAST_YEARS)
+        past = [
+            (await self.get_event_partition(year)).between(start, end, groups=groups)
+            for year in range(first_year, min(end.year, int(self.sort_year) - 1) + 1)
+        ]
+
+        return list(merge(*past, events, key=_event_date))
+
+    def register_student(
+        self, student_id: ObjectId, event_slug: str, registration: dict
+    ):
+        """Applies a registration, written to the database, to the cached student and event."""
+
+        self._update_cached_student(student_id, lambda events: (*events, registration))
+
+        groups = (
+            ("registered", "attended") if registration["attended"] else ("registered",)
+        )
+        self._update_cached_participants(
+            event_slug, registration["event_id"], student_id, add=groups
+        )
+
+        self._written("student", str(student_id))
+        self._written("event", event_slug, self.sort_year)
+
+    def mark_attendance(
+        self,
+        student_id: ObjectId,
+        event_slug: str,
+        event_id: ObjectId,
+        attended: bool = True,
+    ):
+        """Applies a change of attendance, written to the database, to the cached student and event."""
+
+        self._update_cached_student(
+            student_id,
+            lambda events: [
+                {**event, "attended": attended}
+                if event["event_id"] == event_id
+                else event
+                for event in events
+            ],
+        )
+
+        if attended:
+            self._update_cached_participants(
+                event_slug, event_id, student_id, add=("attended",)
+            )
+        else:
+            self._update_cached_participants(
+                event_slug, event_id, student_id, remove=("attended",)
+            )
+
+        self._written("student", str(student_id))
+        self._written("event", event_slug, self.sort_year)
+
+    def unregister_student(
+        self, student_id: ObjectId, event_slug: str, event_id: ObjectId
+    ):
+        """Applies a removed registration, written to the database, to the cached student and event."""
+
+        self._update_cached_student(
+            student_id,
+            lambda events: [event for event in events if event["event_id"] != event_id],
+        )
+        self._update_cached_participants(
+            event_slug, event_id, student_id, remove=("registered", "attended")
+        )
+
+        self._written("student", str(student_id))
+        self._written("event", event_slug, self.sort_year)
+
+    def _update_cached_student(
+        self, student_id: ObjectId, update: Callable[[tuple], Iterable]
+    ):
+        """Replaces the events of the student, if cached with its events, with the result of `update`."""
+
+        student = self._student_cache.lookup(str(student_id))
+
+        if student is not None and student.events is not None:
+            self._cache_student(student._replace(events=tuple(update(student.events))))
+        else:
+            # The L2 store may hold the previous version, with its events.
+            self._drop_from_l2("student", str(student_id))
+
+    def _update_cached_participants(
+        self,
+        event_slug: str,
+        event_id: ObjectId,
+        student_id: ObjectId,
+        add: Iterable[str] = (),
+        remove: Iterable[str] = (),
+    ):
+        """Adds the student to, or removes it from, the participant groups of the event, if cached."""
+
+        event = self._event_cache.get(event_slug)
+
+        if event is None or event.id != event_id:
+            # The L2 store may hold the previous version.
+            self._drop_from_l2("event", event_slug)
+            return
+
+        participants = {group: list(ids) for group, ids in event.participants.items()}
+
+        for group in add:
+            if student_id not in participants.setdefault(group, []):
+                participants[group].append(student_id)
+
+        for group in remove:
+            participants[group] = [
+                id_ for id_ in participants.get(group, []) if id_ != student_id
+            ]
+
+        event = event._replace(
+            participants={group: tuple(ids) for group, ids in participants.items()}
+        )
+
+        self._event_cache[event_slug] = event
+        self._to_l2("event", event_slug, event)
+
+    def apply_invalidation(self, message: Invalidation):
+        """
+        Applies a write published by another instance or worker.
+
+        Students and teams are evicted, along with their L2 copy, and reloaded on demand. Clubs and events
+        are kept and reloaded in the background, since they are listed from the cache. Keys cached as missing
+        are forgotten.
+        """
+
+        logger.debug(
+            "Cache Invalidation - %s - %s", message.entity.title(), message.key
+        )
+
+        if message.entity == "tag":
+            self._query_cache.invalidate(message.key)
+            return
+
+        if message.entity == "revocation":
+            # Applied by the revocation list, which shares the bus.
+            return
+
+        self._query_cache.invalidate(f"{message.entity}:{message.key}")
+
+        if message.entity == "student":
+            key = self._student_key(message.key)
+
+            self._student_cache.discard(key)
+            self._missing_cache.pop(("student", key), None)
+            self._drop_from_l2("student", key)
+
+        elif message.entity == "team":
+            self._team_cache.pop(ObjectId(message.key), None)
+            self._drop_from_l2("team", ObjectId(message.key))
+
+        elif message.entity == "club":
+            club_id = message.key
+            self._missing_cache.pop(("club", club_id), None)
+
+            if club_id in self._club_cache:
+                self._revalidate("club", club_id, lambda: self.fetch_club(club_id))
+
+        elif message.entity == "event":
+            event_id, year = message.key, message.year or str(self.sort_year)
+
+            if year != str(self.sort_year):
+                self._event_history.pop(year, None)
+                return
+
+            self._missing_cache.pop(("event", (event_id, year)), None)
+
+            if event_id in self._event_cache:
+                self._revalidate(
+                    "event", (event_id, year), lambda: self.fetch_event(event_id, year)
+                )
+            else:
+                self._drop_from_l2("event", event_id, year=year)
+
+        else:
+            logger.warning(f"Cache Invalidation - Unknown entity {message.entity}")
+
+    def _written(self, entity: str, key: Hashable, year: Optional[int] = None):
+        """
+        Drops the query results tagged with an entity which was written, and publishes the write to the
+        other instances and workers, if there is a bus.
+        """
+
+        self._query_cache.invalidate(f"{entity}:{key}")
+
+        if self.bus is not None:
+            self.bus.publish(entity, key, year)
+
+    def _l2_namespace(self, entity: str, year: Optional[int] = None) -> str:
+        """Namespace of the records of an entity in the L2 store, records are kept per sort year."""
+
+        return f"{entity}:{self.sort_year if year is None else year}"
+
+    async def _from_l2(
+        self,
+        entity: str,
+        key: Hashable,
+        build: Callable[[dict], Any],
+        year: Optional[int] = None,
+    ) -> Any:
+        """Gets a record (by any of its keys) from the L2 store, None if there is no L2 store or no record."""
+
+        if self.l2 is None:
+            return None
+
+        with self.metrics["l2"].time_load():
+            value = await self.l2.get(self._l2_namespace(entity, year), key)
+
+        if value is not None:
+            try:
+                record = build(bson.decode(value))
+            except (BSONError, KeyError, ValueError) as error:
+                logger.warning(f"Cache L2 - Ignoring invalid {entity} {key}: {error}")
+            else:
+                logger.debug("Cache Hit - L2 %s - %s", entity.title(), key)
+                self.metrics["l2"].hits += 1
+                return record
+
+        self.metrics["l2"].misses += 1
+        return None
+
+    def _to_l2(
+        self,
+        entity: str,
+        key: Hashable,
+        record: Any,
+        aliases: Iterable[Hashable] = (),
+        year: Optional[int] = None,
+    ):
+        """Writes a record to the L2 store, if any, in the background."""
+
+        if self.l2 is not None:
+            self._in_background(
+                self.l2.put(
+                    self._l2_namespace(entity, year),
+                    key,
+                    bson.encode(record.to_document()),
+                    self.l2_student_ttl if entity == "student" else self.l2_ttl,
+                    aliases,
+                )
+            )
+
+    def _drop_from_l2(self, entity: str, key: Hashable, year: Optional[int] = None):
+        """Deletes a record (by any of its keys) from the L2 store, if any, in the background."""
+
+        if self.l2 is not None:
+            self._in_background(self.l2.delete(self._l2_namespace(entity, year), key))
+
+    def _sync_l2(
+        self,
+        entity: str,
+        saved: list[tuple[Hashable, Any]],
+        dropped: list[Hashable],
+        retained: Optional[set[Hashable]] = None,
+    ):
+        """
+        Applies a refresh to the records of an entity in the L2 store, if any, in the background. With
+        `retained`, every record not under one of its keys is deleted.
+        """
+
+        if self.l2 is None:
+            return
+
+        namespace = self._l2_namespace(entity)
+
+        async def sync():
+            await self.l2.put_many(
+                namespace,
+                [(key, bson.encode(record.to_document()), ()) for key, record in saved],
+                self.l2_ttl,
+            )
+            await self.l2.delete_many(namespace, dropped)
+
+            if retained is not None:
+                await self.l2.retain(namespace, retained)
+
+        self._in_background(sync())
+
+    def _in_background(self, coroutine: Awaitable):
+        """Runs a write to the L2 store in the background."""
+
+        task = asyncio.ensure_future(coroutine)
+        self._l2_writes.add(task)
+        task.add_done_callback(self._l2_writes.discard)
+
+    def _revalidate(
+        self, namespace: str, key: Hashable, func: Callable[[], Awaitable]
+    ) -> None:
+        """Refreshes a stale entry in the background, unless a load for it is already in flight."""
+
+        if self._flights.in_flight(namespace, key):
+            return
+
+        logger.debug("Cache Stale - %s - %s", namespace.title(), key)
+
+        task = asyncio.create_task(self._flights.do(namespace, key, func))
+        self._revalidations.add(task)
+        task.add_done_callback(self._revalidated)
+
+    def _revalidated(self, task: asyncio.Task):
+        """Callback for finished background refreshes, the stale entry is kept if the refresh failed."""
+
+        self._revalidations.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background cache refresh failed: {task.exception()!r}")
+
+    def flight_stats(self) -> dict[str, dict[str, int]]:
+        """Returns the number of cache misses that were coalesced into an in-flight load, per entity."""
+
+        return self._flights.stats
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the metrics, size and approximate memory use (in bytes) of every cache, and L2 metrics."""
+
+        caches = {
+            "student": self._student_cache,
+            "team": self._team_cache,
+            "club": self._club_cache,
+            "event": self._event_cache,
+            "event_history": self._event_history,
+            "query": self._query_cache,
+            "missing": self._missing_cache,
+        }
+
+        data: dict[str, Any] = {}
+
+        for name, cache in caches.items():
+            weighed = cache.getsizeof is approximate_size
+
+            data[name] = {
+                **self.metrics[name].snapshot(),
+                "size": len(cache),
+                "bytes": cache.currsize
+                if weighed
+                else sum(approximate_size(value) for value in cache.values()),
+                # The budget of weighed caches is in bytes, the other caches are limited in entries.
+                "maxsize": None if math.isinf(cache.maxsize) else cache.maxsize,
+                "maxsize_unit": "bytes" if weighed else "entries",
+                "ttl": cache.ttl,
+            }
+
+        if self.l2 is not None:
+            data["l2"] = {
+                **self.metrics["l2"].snapshot(),
+                "path": self.l2.path,
+                "ttl": self.l2_ttl,
+                "student_ttl": self.l2_student_ttl,
+            }
+
+        if self.bus is not None:
+            data["invalidation"] = self.bus.stats()
+
+        data["coalescing"] = self.flight_stats()
+        return data
@@ -1,19 +1,78 @@
+"""
+Cached club record.
+"""
+from typing import NamedTuple
+
 from bson import ObjectId
-from pydantic import BaseModel
 
 from mitblr_club_api.models.enums.core_committee import CoreCommittee
 from mitblr_club_api.models.enums.unit import Unit
 
 
-class ClubCache(BaseModel):
-    _id: ObjectId
+class ClubCache(NamedTuple):
+    """
+    Cached club record.
+
+    An immutable, tuple backed record hydrated from trusted database documents without validation. Use
+    :meth:`_replace` to derive an updated record.
+    """
+
+    id: ObjectId
     core_committee: dict[CoreCommittee, ObjectId]
-    faculty_advisors: list[dict[str, str]]
+    faculty_advisors: tuple[dict[str, str], ...]
     institution: str
     name: str
-    team: list[ObjectId]
+    team: tuple[ObjectId, ...]
     slug: str
     unit_type: Unit
 
-    class Config:
-        arbitrary_types_allowed = True
+    @classmethod
+    def from_document(cls, document: dict) -> "ClubCache":
+        """
+        Build the record from a club document.
+
+        :param document: Document from the `clubs` collection.
+        :type document: dict
+
+        :return: The cached club.
+        :rtype: ClubCache
+
+        :raises KeyError: If a field is missing from the document.
+        :raises ValueError: If the unit or a core committee position is unknown.
+        """
+
+        return cls(
+            document["_id"],
+            {
+                CoreCommittee(position): member
+                for position, member in document["core_committee"].items()
+            },
+            tuple(document["faculty_advisors"]),
+            document["institution"],
+            document["name"],
+            tuple(document["team"]),
+            document["slug"],
+            Unit(document["unit_type"]),
+        )
+
+    def to_document(self) -> dict:
+        """
+        Convert the record back into a club document.
+
+        :return: The document, as stored in the `clubs` collection.
+        :rtype: dict
+        """
+
+        return {
+            "_id": self.id,
+            "core_committee": {
+                position.value: member
+                for position, member in self.core_committee.items()
+            },
+            "faculty_advisors": list(self.faculty_advisors),
+            "institution": self.institution,
+            "name": self.name,
+            "team": list(self.team),
+            "slug": self.slug,
+            "unit_type": self.unit_type.value,
+        }
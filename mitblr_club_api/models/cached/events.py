@@ -1,18 +1,74 @@
+"""
+Cached event record.
+"""
 from datetime import datetime
+from typing import NamedTuple
 
 from bson import ObjectId
-from pydantic import BaseModel
 
 from mitblr_club_api.models.enums.clubs import Club
 
 
-class EventCache(BaseModel):
+class EventCache(NamedTuple):
+    """
+    Cached event record.
+
+    An immutable, tuple backed record hydrated from trusted database documents without validation. Use
+    :meth:`_replace` to derive an updated record.
+    """
+
     id: ObjectId
     club: Club
     date: datetime
     location: str
     name: str
+    participants: dict[str, tuple[ObjectId, ...]]
     slug: str
 
-    class Config:
-        arbitrary_types_allowed = True
+    @classmethod
+    def from_document(cls, document: dict) -> "EventCache":
+        """
+        Build the record from an event document.
+
+        :param document: Document from the `events` collection.
+        :type document: dict
+
+        :return: The cached event.
+        :rtype: EventCache
+
+        :raises KeyError: If a field is missing from the document.
+        :raises ValueError: If the club is unknown.
+        """
+
+        return cls(
+            document["_id"],
+            Club(document["club"]),
+            document["date"],
+            document["location"],
+            document["name"],
+            {
+                group: tuple(students)
+                for group, students in document.get("participants", {}).items()
+            },
+            document["slug"],
+        )
+
+    def to_document(self) -> dict:
+        """
+        Convert the record back into an event document.
+
+        :return: The document, as stored in the `events` collection.
+        :rtype: dict
+        """
+
+        return {
+            "_id": self.id,
+            "club": self.club.value,
+            "date": self.date,
+            "location": self.location,
+            "name": self.name,
+            "participants": {
+                group: list(students) for group, students in self.participants.items()
+            },
+            "slug": self.slug,
+        }
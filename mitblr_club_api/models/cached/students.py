@@ -0,0 +1,209 @@
+"""
+Cached student record.
+"""
+from enum import IntEnum
+from typing import NamedTuple, Optional, Union
+
+from bson import ObjectId
+
+from mitblr_club_api.models.enums.course import Course
+from mitblr_club_api.models.enums.mess_provider import MessProvider
+
+
+def _academic_value(value: Union[str, int]) -> Union[Course, int]:
+    """Converts a value of the academic details into a course, or a number (such as the year)."""
+
+    if isinstance(value, int):
+        return value
+
+    try:
+        return Course(value)
+    except ValueError:
+        return int(value)
+
+
+class StudentProfile(IntEnum):
+    """
+    Fields of a student loaded into a cached record. Every profile includes the fields of the profiles
+    before it, so a record serves any lookup asking for its profile or a lower one.
+    """
+
+    # The identifiers of the student: ObjectId, application number, registration number and email.
+    IDENTITY = 1
+    # The identifiers, along with the event registrations of the sort year.
+    EVENTS = 2
+    # Every field, along with the event registrations of every year.
+    FULL = 3
+
+    def projection(self, sort_year: Union[str, int]) -> Optional[dict]:
+        """
+        Projection of the `students` collection loading the fields of the profile.
+
+        :param sort_year: Sort year of the event registrations loaded by the `EVENTS` profile.
+        :type sort_year: Union[str, int]
+
+        :return: The projection, or None to load every field.
+        :rtype: Optional[dict]
+        """
+
+        if self is StudentProfile.FULL:
+            return None
+
+        projection = {
+            "_id": 1,
+            "application_number": 1,
+            "email": 1,
+            "registration_number": 1,
+        }
+
+        if self is StudentProfile.EVENTS:
+            # Registrations without a sort year predate them, they are kept.
+            projection["events"] = {
+                "$filter": {
+                    "input": "$events",
+                    "as": "event",
+                    "cond": {
+                        "$eq": [
+                            {"$ifNull": ["$$event.sort_year", str(sort_year)]},
+                            str(sort_year),
+                        ]
+                    },
+                }
+            }
+
+        return projection
+
+    @classmethod
+    def of(cls, document: dict) -> "StudentProfile":
+        """
+        The profile of a (projected) student document.
+
+        :param document: Document from the `students` collection.
+        :type document: dict
+
+        :return: The profile of the fields present in the document.
+        :rtype: StudentProfile
+        """
+
+        if "name" in document:
+            return cls.FULL
+
+        if "events" in document:
+            return cls.EVENTS
+
+        return cls.IDENTITY
+
+
+class StudentCache(NamedTuple):
+    """
+    Cached student record.
+
+    An immutable, tuple backed record hydrated from trusted database documents without validation. Use
+    :meth:`_replace` to derive an updated record.
+
+    Records may only hold the fields of a :class:`StudentProfile`, the fields outside of their `profile`
+    are None.
+    """
+
+    id: ObjectId
+    academic: Optional[dict[str, Union[Course, int]]]
+    application_number: int
+    clubs: Optional[tuple[ObjectId, ...]]
+    email: str
+    events: Optional[tuple[dict, ...]]
+    institution: Optional[str]
+    mess_provider: Optional[MessProvider]
+    name: Optional[str]
+    phone_number: Optional[str]
+    registration_number: int
+    profile: StudentProfile = StudentProfile.FULL
+
+    @classmethod
+    def from_document(cls, document: dict) -> "StudentCache":
+        """
+        Build the record from a student document, of the profile of the fields present in the document.
+
+        :param document: Document from the `students` collection, possibly projected.
+        :type document: dict
+
+        :return: The cached student.
+        :rtype: StudentCache
+
+        :raises KeyError: If a field is missing from the document.
+        :raises ValueError: If the mess provider or a course is unknown.
+        """
+
+        profile = StudentProfile.of(document)
+
+        if profile is not StudentProfile.FULL:
+            return cls(
+                document["_id"],
+                None,
+                document["application_number"],
+                None,
+                document["email"],
+                None
+                if profile is StudentProfile.IDENTITY
+                else tuple(document["events"]),
+                None,
+                None,
+                None,
+                None,
+                document["registration_number"],
+                profile,
+            )
+
+        return cls(
+            document["_id"],
+            {
+                field: _academic_value(value)
+                for field, value in document["academic"].items()
+            },
+            document["application_number"],
+            tuple(document["clubs"]),
+            document["email"],
+            tuple(document["events"]),
+            document["institution"],
+            MessProvider(document["mess_provider"]),
+            document["name"],
+            document["phone_number"],
+            document["registration_number"],
+        )
+
+    def to_document(self) -> dict:
+        """
+        Convert the record back into a student document, projected to the fields of its profile.
+
+        :return: The document, as stored in the `students` collection.
+        :rtype: dict
+        """
+
+        if self.profile is not StudentProfile.FULL:
+            document = {
+                "_id": self.id,
+                "application_number": self.application_number,
+                "email": self.email,
+                "registration_number": self.registration_number,
+            }
+
+            if self.profile is StudentProfile.EVENTS:
+                document["events"] = list(self.events)
+
+            return document
+
+        return {
+            "_id": self.id,
+            "academic": {
+                field: value.value if isinstance(value, Course) else value
+                for field, value in self.academic.items()
+            },
+            "application_number": self.application_number,
+            "clubs": list(self.clubs),
+            "email": self.email,
+            "events": list(self.events),
+            "institution": self.institution,
+            "mess_provider": self.mess_provider.value,
+            "name": self.name,
+            "phone_number": self.phone_number,
+            "registration_number": self.registration_number,
+        }
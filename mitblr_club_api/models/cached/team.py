@@ -1,22 +1,70 @@
 """
-ClubTeam document model.
+Cached ClubTeam record.
 """
+from typing import NamedTuple, Optional
+
 from bson import ObjectId
-from pydantic import BaseModel
+
+from mitblr_club_api.models.enums.permission import Permission
 
 
-class TeamCache(BaseModel):
+class TeamCache(NamedTuple):
     """
-    ClubTeam document model.
+    Cached ClubTeam record.
+
+    An immutable, tuple backed record hydrated from trusted database documents without validation. Use
+    :meth:`from_document` to derive an updated record, so `grants` matches `permissions`.
     """
 
-    _id: ObjectId
+    id: ObjectId
     api_access: bool
-    auth: ObjectId
+    auth: Optional[ObjectId]
     club: str
     permissions: dict[str, bool]
     position: dict[str, str]
     student_id: ObjectId
+    # Incremented by hand whenever `permissions` or `api_access` change (see MongoDB.md), to detect tokens
+    # issued with stale claims.
+    perm_version: int = 0
+    # The granted `permissions` as a bitmask, checked on every authorized request.
+    grants: Permission = Permission(0)
+
+    @classmethod
+    def from_document(cls, document: dict) -> "TeamCache":
+        """
+        Build the record from a club team document.
+
+        :param document: Document from the `club_teams` collection.
+        :type document: dict
+
+        :return: The cached team member.
+        :rtype: TeamCache
+
+        :raises KeyError: If a field is missing from the document.
+        """
+
+        return cls(
+            document["_id"],
+            document["api_access"],
+            document.get("auth"),
+            document["club"],
+            # Teams without API access may have no permissions.
+            document.get("permissions", {}),
+            document["position"],
+            document["student_id"],
+            document.get("perm_version", 0),
+            Permission.from_document(document.get("permissions", {})),
+        )
+
+    def to_document(self) -> dict:
+        """
+        Convert the record back into a club team document.
+
+        :return: The document, as stored in the `club_teams` collection.
+        :rtype: dict
+        """
 
-    class Config:
-        arbitrary_types_allowed = True
+        document = self._asdict()
+        document["_id"] = document.pop("id")
+        del document["grants"]
+        return document
@@ -0,0 +1,55 @@
+from enum import IntFlag
+
+# Misspelled keys written by earlier versions of MongoDB.md, still read as the key they stand for.
+_LEGACY_KEYS = {"modify_attendance": "modify_attendace"}
+
+
+class Permission(IntFlag):
+    """
+    Permissions of the club teams, as flags combined into a bitmask.
+
+    The name of every permission, in lower case, is its key in the `permissions` field of the club team
+    documents. `ALL` combines every permission of the clubs, `ADMIN` (operating the API through the `/admin`
+    endpoints) is granted on its own. The legacy key `modify_attendace` is read as `modify_attendance`.
+    """
+
+    CREATE_EVENT = 1
+    MODIFY_EVENT = 2
+    DELETE_EVENT = 4
+    GET_EVENT = 8
+    MARK_ATTENDANCE = 16
+    MODIFY_ATTENDANCE = 32
+    ALL = 63
+    ADMIN = 64
+
+    @property
+    def key(self) -> str:
+        """Key of the permission in the club team documents."""
+
+        return self.name.lower()
+
+    @classmethod
+    def from_document(cls, permissions: dict[str, bool]) -> "Permission":
+        """
+        Combine the permissions granted by the `permissions` field of a club team document.
+
+        :param permissions: Whether each permission is granted, by key.
+        :type permissions: dict[str, bool]
+
+        :return: The granted permissions.
+        :rtype: Permission
+        """
+
+        granted = cls(0)
+
+        for permission in cls:
+            # Before Python 3.11, iterating also yields `ALL`, which is not a key of the documents.
+            if permission is cls.ALL:
+                continue
+
+            if permissions.get(
+                permission.key, permissions.get(_LEGACY_KEYS.get(permission.key))
+            ):
+                granted |= permission
+
+        return granted
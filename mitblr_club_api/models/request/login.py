@@ -7,3 +7,7 @@ class Login(BaseModel):
     auth_type: Literal["USER", "AUTOMATION"]
     identifier: str
     secret: str
+
+
+class Refresh(BaseModel):
+    refresh_token: str
@@ -0,0 +1,12 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RevocationRequest(BaseModel):
+    """
+    Token revocation model, revoking either a single token or every token of an authentication.
+    """
+
+    jti: Optional[str] = None
+    auth_id: Optional[str] = None
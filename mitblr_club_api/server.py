@@ -1,5 +1,7 @@
-import bcrypt
+from datetime import timedelta
+
 import jwt
+from bson import ObjectId
 
 import motor.motor_asyncio as async_motor
 from dotenv import dotenv_values
@@ -9,8 +11,17 @@ from sanic_ext import validate
 
 from .app import appserver
 from .models.cache_tup import Cache
-from .models.request.login import Login
+from .utils.diskstore import DiskStore
+from .utils.invalidation import InvalidationBus, MongoTransport
+from .utils.keys import ALGORITHMS, KeyManager
+from .utils.passwords import HasherBusy, PasswordHasher, PoolFull
+from .utils.revocation import RevocationList
+from .utils.sessions import RefreshTokenError, RefreshTokenReused, SessionStore
+from .utils.shared import SharedSegment
+from .utils.tokens import TokenCache
+from .models.request.login import Login, Refresh
 from .utils import generate_jwt
+from .utils.permissions import automation_permissions, permission_claims
 from .models.internal.team import Team
 from .utils import tasks
 
@@ -22,13 +33,6 @@ import mitblr_club_api.endpoints
 logger.debug("Loading ENV")
 config = dotenv_values(".env")
 
-# Read the public and private keys and add them to the config.
-with open("public-key.pem") as public_key_file:
-    config["PUB_KEY"] = public_key_file.read()
-
-with open("private-key.pem") as private_key_file:
-    config["PRIV_KEY"] = private_key_file.read()
-
 # Try to get state from the ENV, defaults to being dev.
 is_prod: str = config.get("IS_PROD", "false")
 
@@ -40,6 +44,46 @@ app.config.update(config)
 app.config.PROXIES_COUNT = int(config.get("PROXIES_COUNT", 0))
 
 
+@app.listener("before_server_start")
+async def register_keys(app: Sanic):
+    # Keys are parsed once, tokens are signed with the active key and verified with the key named by their
+    # `kid` header, so keys can be rotated without invalidating the tokens already issued.
+    keys_dir = app.config.get("JWT_KEYS_DIR")
+    if keys_dir:
+        retired = (app.config.get("JWT_RETIRED_KIDS") or "").split(",")
+        # While migrating to another algorithm, the tokens of both algorithms are accepted.
+        algorithms = (app.config.get("JWT_ACCEPTED_ALGORITHMS") or "").split(",")
+        app.ctx.keys = KeyManager.from_directory(
+            keys_dir,
+            active=app.config.get("JWT_ACTIVE_KID") or None,
+            retired=[kid.strip() for kid in retired if kid.strip()],
+            algorithm=app.config.get("JWT_ALGORITHM") or None,
+            algorithms=[name.strip() for name in algorithms if name.strip()]
+            or ALGORITHMS,
+        )
+    else:
+        app.ctx.keys = KeyManager.from_files("private-key.pem", "public-key.pem")
+
+    # Claims of the tokens verified by the worker, keyed by the digest of the token.
+    app.ctx.tokens = TokenCache(
+        app.ctx.keys, maxsize=int(app.config.get("TOKEN_CACHE_SIZE") or 10_000)
+    )
+
+
+@app.listener("before_server_start")
+async def register_password_hasher(app: Sanic):
+    # bcrypt takes tens to hundreds of milliseconds, passwords are hashed by a bounded pool of threads.
+    app.ctx.passwords = PasswordHasher(
+        workers=int(app.config.get("PASSWORD_WORKERS") or 0) or None,
+        max_queue=int(app.config.get("PASSWORD_QUEUE") or 32),
+    )
+
+
+@app.listener("after_server_stop")
+async def close_password_hasher(app: Sanic):
+    app.ctx.passwords.close()
+
+
 @app.listener("before_server_start")
 async def register_db(app: Sanic):
     logger.info("Connecting to MongoDB.")
@@ -74,10 +118,107 @@ async def register_db(app: Sanic):
         logger.info("Connected to DEV ENV")
         app.ctx.db = client["mitblr-club-dev"]
 
-    app.ctx.cache = Cache(app.ctx.db, sort_year=app.config["SORT_YEAR"])
+    # Memory budgets of the caches, in megabytes, e.g. CACHE_STUDENT_MB=32.
+    budgets = {
+        name: float(app.config[f"CACHE_{name.upper()}_MB"]) * 1024 * 1024
+        for name in ("student", "team", "club", "event", "event_history", "query")
+        if app.config.get(f"CACHE_{name.upper()}_MB")
+    }
+
+    # With several workers, a single worker can refresh the clubs, events and teams and share them with the
+    # other workers through shared memory.
+    shared = None
+    shared_name = app.config.get("CACHE_SHARED_NAME")
+    if shared_name:
+        size = float(app.config.get("CACHE_SHARED_MB") or 64) * 1024 * 1024
+        shared = SharedSegment(shared_name, int(size))
+
+    # Students, teams and events missing from the in-memory caches are looked up in a local store, shared by
+    # the workers of the host, before the database.
+    l2 = None
+    l2_path = app.config.get("CACHE_L2_PATH")
+    if l2_path:
+        l2 = DiskStore(l2_path)
+
+    # With several instances, the writes applied to the caches of one worker are published through a capped
+    # collection, so every other worker of every instance evicts or reloads its copies.
+    bus = None
+    invalidation_collection = app.config.get("CACHE_INVALIDATION_COLLECTION")
+    if invalidation_collection:
+        bus = InvalidationBus(MongoTransport(app.ctx.db, invalidation_collection))
+
+    app.ctx.cache = Cache(
+        app.ctx.db,
+        sort_year=app.config["SORT_YEAR"],
+        budgets=budgets,
+        shared=shared,
+        l2=l2,
+        bus=bus,
+    )
+
+    if bus is not None:
+        await bus.start()
+
+    # Revoked tokens, checked on every request against in-memory maps synced from the database.
+    app.ctx.revocations = RevocationList(
+        app.ctx.db,
+        app.config.get("REVOCATION_COLLECTION") or "revocations",
+        bus=bus,
+    )
+    await app.ctx.revocations.start()
+    sync_revocations.start(app)
+
+    # Logins start sessions, whose rotating refresh tokens issue new tokens without checking the password.
+    app.ctx.sessions = SessionStore(
+        app.ctx.db,
+        app.config.get("SESSION_COLLECTION") or "sessions",
+        idle=timedelta(hours=float(app.config.get("SESSION_IDLE_HOURS") or 24)),
+        lifetime=timedelta(days=float(app.config.get("SESSION_LIFETIME_DAYS") or 30)),
+        revocations=app.ctx.revocations,
+    )
+    await app.ctx.sessions.start()
+
+    # Serve the clubs and events of the last snapshot, while they are reconciled with the database.
+    snapshot = app.config.get("CACHE_SNAPSHOT_PATH")
+    if snapshot:
+        app.ctx.cache.load_snapshot(snapshot)
+
     ensure_cache.start(app)
 
 
+@app.listener("before_server_stop")
+async def close_invalidation_bus(app: Sanic, loop):
+    # The invalidations being published are sent while the database is still connected.
+    if app.ctx.cache.bus is not None:
+        await app.ctx.cache.bus.close()
+
+
+@app.listener("after_server_stop")
+async def close_cache(app: Sanic, loop):
+    cache: Cache = app.ctx.cache
+    snapshot = app.config.get("CACHE_SNAPSHOT_PATH")
+
+    # Every worker holds the same clubs and events when they are shared, the leader saves them.
+    if snapshot and (cache.shared is None or cache.shared.is_leader):
+        try:
+            cache.save_snapshot(snapshot)
+        except (OSError, ValueError) as error:
+            logger.warning(f"Failed to save the cache snapshot: {error!r}")
+
+    if cache.shared is not None:
+        cache.shared.close()
+
+    if cache.l2 is not None:
+        cache.l2.close()
+
+
+@app.listener("main_process_stop")
+async def unlink_shared_cache(app: Sanic, loop):
+    shared_name = app.config.get("CACHE_SHARED_NAME")
+    if shared_name:
+        SharedSegment.unlink(shared_name)
+
+
 @app.listener("after_server_stop")
 async def close_connection(app: Sanic, loop):
     app.ctx.db_client.close()
@@ -101,7 +242,7 @@ async def jwt_status(request: Request):
         return response.json(d)
 
     try:
-        jwt.decode(request.token, key=request.app.config["PUB_KEY"], algorithms="RS256")
+        claims = request.app.ctx.tokens.decode(request.token)
     except jwt.exceptions.ImmatureSignatureError:
         # Raised when a token’s nbf claim represents a time in the future
         d = {
@@ -122,9 +263,14 @@ async def jwt_status(request: Request):
         d = {"authenticated": False, "message": "JWT invalid"}
         status = 401
     else:
-        # Valid Token
-        d = {"authenticated": True, "message": "JWT is valid"}
-        status = 200
+        if request.app.ctx.revocations.is_revoked(claims):
+            # Valid, but revoked
+            d = {"authenticated": False, "message": "JWT has been revoked"}
+            status = 401
+        else:
+            # Valid Token
+            d = {"authenticated": True, "message": "JWT is valid"}
+            status = 200
 
     return response.json(d, status=status)
 
@@ -132,7 +278,26 @@ async def jwt_status(request: Request):
 @app.post("/login")
 @validate(json=Login)
 async def login(request: Request, body: Login):
+    try:
+        return await authenticate(request, body)
+    except HasherBusy as error:
+        # Either every thread hashing is busy and the queue is full, or the identifier is throttled.
+        return json(
+            {
+                "authenticated": False,
+                "message": "Too many login attempts, retry later",
+                "error": "Service Unavailable"
+                if isinstance(error, PoolFull)
+                else "Too Many Requests",
+            },
+            status=503 if isinstance(error, PoolFull) else 429,
+            headers={"Retry-After": str(error.retry_after)},
+        )
+
+
+async def authenticate(request: Request, body: Login):
     status = 200
+    passwords: PasswordHasher = request.app.ctx.passwords
 
     if body.auth_type == "USER":
         user = body.identifier
@@ -159,7 +324,7 @@ async def login(request: Request, body: Login):
         if password_hash is None or password_hash == b"":
             # Operations team password setup.
             # Generate a hash for the password and store it in the database
-            password_hash = bcrypt.hashpw(password.encode(), salt=bcrypt.gensalt())
+            password_hash = await passwords.hashpw(password.encode())
 
             # Upsert password hash to MongoDB.
             await collection.update_one(
@@ -172,21 +337,13 @@ async def login(request: Request, body: Login):
             verified = True
         else:
             # Verify the password for existing users.
-            verified = bcrypt.checkpw(password.encode(), password_hash)
+            verified = await passwords.checkpw(
+                password.encode(), password_hash, identifier=f"USER:{user}"
+            )
 
         # If verified, generate JWT.
         if verified:
-            jwt_data = {
-                "auth_id": str(doc["_id"]),
-                "student_id": str(doc["student_id"]),
-                "team_id": str(doc["team_id"]),
-            }
-
-            jwt_ = await generate_jwt(app=request.app, data=jwt_data, validity=90)
-            json_payload = {"identifier": jwt_, "authenticated": True}
-
-            # Fetch and cache team data.
-            await request.app.ctx.cache.fetch_team(jwt_data["team_id"])
+            json_payload = await start_session(request, login_claims(doc), validity=90)
 
         else:
             # If not verified, return error.
@@ -207,25 +364,127 @@ async def login(request: Request, body: Login):
         collection = request.app.ctx.db["authentication"]
         doc = await collection.find_one({"auth_type": "AUTOMATION", "app_id": app_id})
 
-        if bcrypt.checkpw(token.encode(), doc["token"]):
-            # TODO - Add useful data
-            jwt_data = {"username": app_id}
-            jwt_ = await generate_jwt(app=request.app, data=jwt_data, validity=1440)
-            json_payload = {"identifier": jwt_, "authenticated": True}
+        if await passwords.checkpw(
+            token.encode(), doc["token"], identifier=f"AUTOMATION:{app_id}"
+        ):
+            json_payload = await start_session(
+                request, login_claims(doc), validity=1440
+            )
         else:
             json_payload = {"identifier": app_id, "authenticated": False}
 
         return response.json(json_payload)
 
 
-@tasks.loop(hours=3)
+def login_claims(doc: dict) -> dict:
+    if doc["auth_type"] == "USER":
+        return {
+            "auth_id": str(doc["_id"]),
+            "student_id": str(doc["student_id"]),
+            "team_id": str(doc["team_id"]),
+        }
+
+    # TODO - Add useful data
+    return {
+        "auth_id": str(doc["_id"]),
+        "username": doc["app_id"],
+        "perms": int(automation_permissions(doc)),
+    }
+
+
+async def issue_jwt(request: Request, jwt_data: dict, validity: int) -> str:
+    jwt_data = dict(jwt_data)
+
+    if "team_id" in jwt_data:
+        # Fetch and cache team data.
+        team = await request.app.ctx.cache.fetch_team(jwt_data["team_id"])
+
+        # Scope the token to the club and permissions of the team, so it is authorized without the team.
+        if team is not None:
+            jwt_data.update(permission_claims(team))
+
+    return await generate_jwt(app=request.app, data=jwt_data, validity=validity)
+
+
+async def start_session(request: Request, jwt_data: dict, validity: int) -> dict:
+    # Every refresh reads the claims from the authentication and its team again, as on login.
+    refresh_token = await request.app.ctx.sessions.create(jwt_data["auth_id"], validity)
+    jwt_ = await issue_jwt(request, jwt_data, validity)
+
+    return {"identifier": jwt_, "refresh_token": refresh_token, "authenticated": True}
+
+
+@app.post("/refresh")
+@validate(json=Refresh)
+async def refresh(request: Request, body: Refresh):
+    sessions: SessionStore = request.app.ctx.sessions
+
+    try:
+        session, refresh_token = await sessions.refresh(body.refresh_token)
+    except RefreshTokenReused:
+        # The refresh token was copied, the session and the tokens issued to the authentication are revoked.
+        return json(
+            {
+                "authenticated": False,
+                "message": "Refresh token reused, log in again",
+                "error": "Unauthorized",
+            },
+            status=401,
+        )
+    except RefreshTokenError:
+        return json(
+            {
+                "authenticated": False,
+                "message": "Refresh token invalid",
+                "error": "Unauthorized",
+            },
+            status=401,
+        )
+
+    # The authentication may have been deleted or changed since the login.
+    doc = await request.app.ctx.db["authentication"].find_one(
+        {"_id": ObjectId(session["auth_id"])}
+    )
+
+    if doc is None:
+        await sessions.revoke_auth(session["auth_id"])
+        return json(
+            {
+                "authenticated": False,
+                "message": "Authentication no longer exists",
+                "error": "Unauthorized",
+            },
+            status=401,
+        )
+
+    jwt_ = await issue_jwt(request, login_claims(doc), session["validity"])
+
+    return json(
+        {"identifier": jwt_, "refresh_token": refresh_token, "authenticated": True}
+    )
+
+
+@tasks.loop(minutes=1)
 async def ensure_cache(app: Sanic):
-    """Task that runs each hour to ensure cache is populated with Events and Clubs"""
-    logger.info("Task running")
+    """Task that runs each minute to keep the cache of Events, Clubs and Teams in sync with the database"""
+    logger.debug("Task running")
     cache: Cache = app.ctx.cache
 
-    await cache.refresh_events()
-    await cache.refresh_clubs()
+    # Refreshes are incremental, a failed one is retried from the same watermark on the next run while
+    # the cache keeps serving (possibly stale) entries.
+    try:
+        await cache.refresh()
+    except Exception as error:
+        logger.exception(f"Cache refresh failed: {error!r}")
+
+
+@tasks.loop(seconds=10)
+async def sync_revocations(app: Sanic):
+    """Task that runs every 10 seconds to read the tokens revoked by other instances"""
+    try:
+        await app.ctx.revocations.sync()
+    except Exception as error:
+        logger.exception(f"Revocation sync failed: {error!r}")
 
 
 if __name__ == "__main__":
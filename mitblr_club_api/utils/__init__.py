@@ -1,21 +1,32 @@
+import uuid
 from datetime import datetime, timedelta
+from typing import Optional
 
-import jwt
 from jwt import InvalidTokenError
 from sanic import Request, Sanic
 
 
 async def check_request_for_authorization_status(request: Request) -> bool:
     """Checks if the given request is containing a basic auth token"""
+    return authenticate_request(request) is not None
+
+
+def authenticate_request(request: Request) -> Optional[dict]:
+    """Returns the claims of the token of the given request, None if it has no valid token"""
     if not request.token:
-        return False
+        return None
 
     try:
-        jwt.decode(request.token, key=request.app.config["PUB_KEY"], algorithms="RS256")
+        # Verified once per token, then served from the cache until the token expires.
+        claims = request.app.ctx.tokens.decode(request.token)
     except InvalidTokenError:
-        return False
+        return None
+
+    # Revocations are checked on every request, as verified tokens are cached.
+    if request.app.ctx.revocations.is_revoked(claims):
+        return None
 
-    return True
+    return claims
 
 
 async def generate_jwt(app: Sanic, data: dict, validity: int) -> str:
@@ -31,5 +42,8 @@ async def generate_jwt(app: Sanic, data: dict, validity: int) -> str:
         app.stop()
 
     iss = f"MITBLR_CLUB_API_{host}"
-    data.update({"exp": expire, "iat": now, "nbf": now, "iss": iss})
-    return jwt.encode(data, app.config["PRIV_KEY"], algorithm="RS256")
+    # The ID of the token (`jti`) allows revoking it alone.
+    data.update(
+        {"exp": expire, "iat": now, "nbf": now, "iss": iss, "jti": uuid.uuid4().hex}
+    )
+    return app.ctx.keys.sign(data)
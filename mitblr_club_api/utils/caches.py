@@ -0,0 +1,582 @@
+"""TTL cache variants backing the in-memory caches of the API."""
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import islice
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+from cachetools import Cache, TTLCache
+
+from .metrics import CacheMetrics
+from .sketch import FrequencySketch
+
+# fmt: off
+__all__ = (
+    'EvictingTTLCache',
+    'MultiKeyTTLCache',
+    'SoftTTLCache',
+    'SortedPartition',
+    'SortedSoftTTLCache',
+    'TaggedTTLCache',
+)
+# fmt: on
+
+# Number of the entries closest to expiry among which the entry to evict is chosen.
+VICTIM_SAMPLE = 5
+
+
+class EvictingTTLCache(TTLCache):
+    """
+    A :class:`TTLCache` which reports every entry leaving the cache, whether through expiry, size based
+    eviction or an explicit deletion, to :meth:`on_remove`.
+
+    When given :class:`CacheMetrics`, evictions and expirations are counted in them.
+
+    When given a :class:`FrequencySketch`, the cache is frequency aware (TinyLFU): once full, a new entry
+    is only admitted if its key was seen more often recently than the entry it would evict, and the entry
+    evicted is the least frequently seen of the few entries closest to expiry. One-off lookups (such as
+    bulk scans) therefore cannot flush frequently used entries.
+    """
+
+    def __init__(
+        self,
+        maxsize: float,
+        ttl: float,
+        metrics: Optional[CacheMetrics] = None,
+        sketch: Optional[FrequencySketch] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(maxsize, ttl, **kwargs)
+
+        self.metrics = metrics
+        self.sketch = sketch
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if self.sketch is not None and key in self:
+            self.sketch.increment(key)
+
+        return super().get(key, default)
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        # Replacing an entry is always allowed, only new entries go through admission.
+        if self.sketch is not None and not Cache.__contains__(self, key):
+            self.sketch.increment(key)
+
+            if not self._admit(key, value):
+                if self.metrics is not None:
+                    self.metrics.rejections += 1
+
+                return
+
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        # Read the raw value, an expired entry is still removed (and reported) here.
+        value = Cache.__getitem__(self, key)
+
+        try:
+            super().__delitem__(key)
+        finally:
+            self.on_remove(key, value)
+
+    def expire(self, time: Optional[float] = None) -> list[tuple[Hashable, Any]]:
+        expired = super().expire(time)
+
+        for key, value in expired:
+            self.on_remove(key, value)
+
+        if expired and self.metrics is not None:
+            self.metrics.expirations += len(expired)
+
+        return expired
+
+    def popitem(self) -> tuple[Hashable, Any]:
+        if self.sketch is None:
+            item = super().popitem()
+        else:
+            self.expire()
+            key = self._victim()
+
+            if key is None:
+                raise KeyError(f"{type(self).__name__} is empty")
+
+            item = (key, self.pop(key))
+
+        if self.metrics is not None:
+            self.metrics.evictions += 1
+
+        return item
+
+    def _admit(self, key: Hashable, value: Any) -> bool:
+        """Decide if a new entry may be added, possibly evicting others to make room for it."""
+
+        size = self.getsizeof(value)
+
+        if size > self.maxsize:
+            return False
+
+        self.expire()
+
+        if self.currsize + size <= self.maxsize:
+            return True
+
+        victim = self._victim()
+        return victim is None or self.sketch.estimate(key) > self.sketch.estimate(
+            victim
+        )
+
+    def _victim(self) -> Optional[Hashable]:
+        """The least frequently seen of the entries closest to expiry."""
+
+        return min(
+            islice(iter(self), VICTIM_SAMPLE), key=self.sketch.estimate, default=None
+        )
+
+    def on_remove(self, key: Hashable, value: Any) -> None:
+        """
+        Hook called after an entry has been removed from the cache.
+
+        :param key: Key of the removed entry.
+        :type key: Hashable
+        :param value: Value of the removed entry.
+        :type value: Any
+        """
+
+
+class MultiKeyTTLCache(EvictingTTLCache):
+    """
+    A TTL cache where every entry is stored once under a primary key, but can be reached through any
+    number of aliases. Storing, evicting or expiring an entry updates all of its aliases together.
+    """
+
+    def __init__(self, maxsize: float, ttl: float, **kwargs: Any):
+        super().__init__(maxsize, ttl, **kwargs)
+
+        self._aliases: dict[Hashable, Hashable] = {}
+        self._alias_sets: dict[Hashable, tuple[Hashable, ...]] = {}
+
+    def lookup(self, alias: Hashable, default: Any = None) -> Any:
+        """
+        Get an entry through any of its aliases.
+
+        :param alias: Primary key or alias of the entry.
+        :type alias: Hashable
+        :param default: Value returned when no live entry is reachable through the alias.
+        :type default: Any
+
+        :return: The cached value, or `default`.
+        :rtype: Any
+        """
+
+        key = self._aliases.get(alias)
+
+        if key is None:
+            return default
+
+        return self.get(key, default)
+
+    def store(self, key: Hashable, value: Any, aliases: Iterable[Hashable]) -> None:
+        """
+        Store (or replace) an entry under its primary key and make it reachable through `aliases`.
+
+        :param key: Primary key of the entry.
+        :type key: Hashable
+        :param value: Value to store.
+        :type value: Any
+        :param aliases: Alternative keys for the entry. Aliases of a previous version of the entry that
+                        are not repeated here stop resolving.
+        :type aliases: Iterable[Hashable]
+        """
+
+        # Drop the previous version along with all of its aliases.
+        self.discard(key)
+
+        self[key] = value
+
+        if not Cache.__contains__(self, key):
+            # The entry was not admitted.
+            return
+
+        alias_set = tuple(dict.fromkeys((key, *aliases)))
+        self._alias_sets[key] = alias_set
+
+        for alias in alias_set:
+            self._aliases[alias] = key
+
+    def discard(self, alias: Hashable) -> None:
+        """
+        Remove the entry reachable through `alias`, along with all of its other aliases.
+
+        :param alias: Primary key or alias of the entry.
+        :type alias: Hashable
+        """
+
+        key = self._aliases.get(alias)
+
+        if key is None or not Cache.__contains__(self, key):
+            return
+
+        try:
+            del self[key]
+        except KeyError:
+            # The entry had already expired, it has been removed regardless.
+            pass
+
+    def on_remove(self, key: Hashable, value: Any) -> None:
+        for alias in self._alias_sets.pop(key, ()):
+            if self._aliases.get(alias) == key:
+                del self._aliases[alias]
+
+
+class TaggedTTLCache(EvictingTTLCache):
+    """
+    A TTL cache where every entry carries any number of tags, so all the entries sharing a tag can be
+    removed together, without knowing their keys.
+    """
+
+    def __init__(self, maxsize: float, ttl: float, **kwargs: Any):
+        super().__init__(maxsize, ttl, **kwargs)
+
+        self._tagged: dict[Hashable, set[Hashable]] = {}
+        self._tags: dict[Hashable, tuple[Hashable, ...]] = {}
+
+    def store(self, key: Hashable, value: Any, tags: Iterable[Hashable]) -> None:
+        """
+        Store (or replace) an entry under its key, with `tags`.
+
+        :param key: Key of the entry.
+        :type key: Hashable
+        :param value: Value to store.
+        :type value: Any
+        :param tags: Tags of the entry, replacing the tags of a previous version of the entry.
+        :type tags: Iterable[Hashable]
+        """
+
+        # Drop the previous version along with its tags, even if it has expired.
+        if Cache.__contains__(self, key):
+            try:
+                del self[key]
+            except KeyError:
+                pass
+
+        self[key] = value
+
+        if not Cache.__contains__(self, key):
+            # The entry was not admitted.
+            return
+
+        tags = tuple(dict.fromkeys(tags))
+        self._tags[key] = tags
+
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+
+    def invalidate(self, tag: Hashable) -> int:
+        """
+        Remove every entry carrying `tag`.
+
+        :param tag: Tag of the entries.
+        :type tag: Hashable
+
+        :return: The number of entries removed.
+        :rtype: int
+        """
+
+        removed = 0
+
+        for key in list(self._tagged.get(tag, ())):
+            removed += self.pop(key, None) is not None
+
+        return removed
+
+    def on_remove(self, key: Hashable, value: Any) -> None:
+        for tag in self._tags.pop(key, ()):
+            keys = self._tagged.get(tag)
+
+            if keys is not None:
+                keys.discard(key)
+
+                if not keys:
+                    del self._tagged[tag]
+
+
+class SoftTTLCache(EvictingTTLCache):
+    """
+    A TTL cache with a soft and a hard time-to-live.
+
+    Entries are removed once the hard TTL (`ttl`) has passed, like in a :class:`TTLCache`. Once the soft
+    TTL has passed they are still served but reported as stale by :meth:`is_stale`, so the caller can
+    refresh them in the background.
+    """
+
+    def __init__(self, maxsize: float, ttl: float, soft_ttl: float, **kwargs: Any):
+        if soft_ttl > ttl:
+            raise ValueError("soft_ttl must not be greater than ttl.")
+
+        super().__init__(maxsize, ttl, **kwargs)
+
+        self._soft_ttl = soft_ttl
+        self._stale_at: dict[Hashable, float] = {}
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self.timer as time:
+            super().__setitem__(key, value)
+
+            if Cache.__contains__(self, key):
+                self._stale_at[key] = time + self._soft_ttl
+
+    @property
+    def soft_ttl(self) -> float:
+        """The time after which entries are served as stale."""
+
+        return self._soft_ttl
+
+    def is_stale(self, key: Hashable) -> bool:
+        """
+        Check if an entry has outlived its soft TTL.
+
+        :param key: Key of the entry.
+        :type key: Hashable
+
+        :return: True if the entry is stale or not present, else False.
+        :rtype: bool
+        """
+
+        stale_at = self._stale_at.get(key)
+        return stale_at is None or not (self.timer() < stale_at)
+
+    def touch(self) -> None:
+        """Restart the soft and hard TTL of every live entry, marking them all as fresh."""
+
+        for key, value in list(self.items()):
+            self[key] = value
+
+    def on_remove(self, key: Hashable, value: Any) -> None:
+        self._stale_at.pop(key, None)
+
+
+class SortedSoftTTLCache(SoftTTLCache):
+    """
+    A :class:`SoftTTLCache` which keeps its entries ordered by a sort key, both overall and within groups,
+    to answer range queries in `O(log n + k)` instead of scanning every entry.
+    """
+
+    def __init__(
+        self,
+        maxsize: float,
+        ttl: float,
+        soft_ttl: float,
+        sort_key: Callable[[Any], Any],
+        group_key: Callable[[Any], Hashable],
+        **kwargs: Any,
+    ):
+        """
+        Initialize the cache.
+
+        :param maxsize: Maximum size of the cache, may be `math.inf`.
+        :type maxsize: float
+        :param ttl: Hard time-to-live of the entries.
+        :type ttl: float
+        :param soft_ttl: Soft time-to-live of the entries.
+        :type soft_ttl: float
+        :param sort_key: Function returning the value entries are ordered by.
+        :type sort_key: Callable[[Any], Any]
+        :param group_key: Function returning the group of an entry, range queries can be limited to groups.
+        :type group_key: Callable[[Any], Hashable]
+        """
+
+        super().__init__(maxsize, ttl, soft_ttl, **kwargs)
+
+        self._sort_key = sort_key
+        self._group_key = group_key
+
+        # Sorted lists of `(sort value, key)`, overall and per group.
+        self._order: list[tuple[Any, Hashable]] = []
+        self._groups: dict[Hashable, list[tuple[Any, Hashable]]] = {}
+        self._positions: dict[Hashable, tuple[Any, Hashable]] = {}
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        super().__setitem__(key, value)
+
+        if not Cache.__contains__(self, key):
+            # The entry was not admitted.
+            return
+
+        position = (self._sort_key(value), key)
+        group = self._group_key(value)
+
+        if self._positions.get(key) == (position, group):
+            return
+
+        self._unindex(key)
+        self._positions[key] = (position, group)
+
+        insort(self._order, position)
+        insort(self._groups.setdefault(group, []), position)
+
+    def between(
+        self, start: Any, end: Any, groups: Optional[Iterable[Hashable]] = None
+    ) -> list[Any]:
+        """
+        Get the entries whose sort value lies within `[start, end)`, in order.
+
+        :param start: Inclusive lower bound of the sort value.
+        :type start: Any
+        :param end: Exclusive upper bound of the sort value.
+        :type end: Any
+        :param groups: Groups to limit the query to, all entries are considered if None.
+        :type groups: Optional[Iterable[Hashable]]
+
+        :return: Values of the matching entries, ordered by their sort value.
+        :rtype: list[Any]
+        """
+
+        self.expire()
+
+        if groups is None:
+            orders = [self._order]
+        else:
+            orders = [self._groups[group] for group in groups if group in self._groups]
+
+        ranges = [
+            order[bisect_left(order, (start,)) : bisect_left(order, (end,))]
+            for order in orders
+        ]
+
+        return [self[key] for _, key in merge(*ranges)]
+
+    def first(self) -> Any:
+        """
+        Get the entry with the lowest sort value.
+
+        :return: Value of the entry, or None if the cache is empty.
+        :rtype: Any
+        """
+
+        self.expire()
+
+        if not self._order:
+            return None
+
+        return self[self._order[0][1]]
+
+    def on_remove(self, key: Hashable, value: Any) -> None:
+        super().on_remove(key, value)
+        self._unindex(key)
+
+    def _unindex(self, key: Hashable) -> None:
+        indexed = self._positions.pop(key, None)
+
+        if indexed is None:
+            return
+
+        position, group = indexed
+
+        for order in (self._order, self._groups[group]):
+            del order[bisect_left(order, position)]
+
+        if not self._groups[group]:
+            del self._groups[group]
+
+
+class SortedPartition:
+    """
+    An immutable set of entries, reachable by key and ordered by a sort key both overall and within groups,
+    like a :class:`SortedSoftTTLCache` without expiry.
+
+    Partitions are meant to be loaded and cached as a whole (for instance all the events of a year), and
+    replaced as a whole when any of their entries changes.
+    """
+
+    __slots__ = ("_entries", "_order", "_groups")
+
+    def __init__(
+        self,
+        entries: Iterable[tuple[Hashable, Any]],
+        sort_key: Callable[[Any], Any],
+        group_key: Callable[[Any], Hashable],
+    ):
+        """
+        Build the partition.
+
+        :param entries: Keys and values of the entries.
+        :type entries: Iterable[tuple[Hashable, Any]]
+        :param sort_key: Function returning the value entries are ordered by.
+        :type sort_key: Callable[[Any], Any]
+        :param group_key: Function returning the group of an entry, range queries can be limited to groups.
+        :type group_key: Callable[[Any], Hashable]
+        """
+
+        self._entries: dict[Hashable, Any] = dict(entries)
+        self._order: list[tuple[Any, Hashable]] = []
+        self._groups: dict[Hashable, list[tuple[Any, Hashable]]] = {}
+
+        for key, value in self._entries.items():
+            position = (sort_key(value), key)
+
+            self._order.append(position)
+            self._groups.setdefault(group_key(value), []).append(position)
+
+        self._order.sort()
+
+        for order in self._groups.values():
+            order.sort()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get an entry by key.
+
+        :param key: Key of the entry.
+        :type key: Hashable
+        :param default: Value returned when there is no entry under the key.
+        :type default: Any
+
+        :return: The value of the entry, or `default`.
+        :rtype: Any
+        """
+
+        return self._entries.get(key, default)
+
+    def values(self) -> Iterable[Any]:
+        """Values of the entries, in no particular order."""
+
+        return self._entries.values()
+
+    def between(
+        self, start: Any, end: Any, groups: Optional[Iterable[Hashable]] = None
+    ) -> list[Any]:
+        """
+        Get the entries whose sort value lies within `[start, end)`, in order.
+
+        :param start: Inclusive lower bound of the sort value.
+        :type start: Any
+        :param end: Exclusive upper bound of the sort value.
+        :type end: Any
+        :param groups: Groups to limit the query to, all entries are considered if None.
+        :type groups: Optional[Iterable[Hashable]]
+
+        :return: Values of the matching entries, ordered by their sort value.
+        :rtype: list[Any]
+        """
+
+        if groups is None:
+            orders = [self._order]
+        else:
+            orders = [self._groups[group] for group in groups if group in self._groups]
+
+        ranges = [
+            order[bisect_left(order, (start,)) : bisect_left(order, (end,))]
+            for order in orders
+        ]
+
+        return [self._entries[key] for _, key in merge(*ranges)]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"<SortedPartition entries={len(self._entries)}>"
@@ -0,0 +1,294 @@
+"""A local on-disk key-value store, used as a second cache tier shared by the workers of a host."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_log = logging.getLogger(__name__)
+
+# fmt: off
+__all__ = (
+    'DiskStore',
+)
+# fmt: on
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS aliases (
+    namespace TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (namespace, alias)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at);
+CREATE INDEX IF NOT EXISTS aliases_key ON aliases (namespace, key);
+"""
+
+
+class DiskStore:
+    """
+    An SQLite backed store of binary values with a time-to-live, reachable through any number of aliases.
+
+    The database is in WAL mode, so any number of processes (such as the workers of a server) can read it
+    while one of them writes. The store is a cache, its errors are logged and treated as misses rather than
+    raised.
+
+    SQLite calls block, they are run in a dedicated thread so they do not block the event loop, one at a
+    time and in the order they were made.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        """
+        Open (or create) the store.
+
+        :param path: Path of the database file.
+        :type path: str
+        :param busy_timeout: Seconds to wait for the write lock, when another process is writing.
+        :type busy_timeout: float
+        """
+
+        self.path = path
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="diskstore"
+        )
+
+        # Only ever used from the executor's thread.
+        self._connection = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    async def get(self, namespace: str, alias: Any) -> Optional[bytes]:
+        """
+        Get a live value through its key or any of its aliases.
+
+        :param namespace: Namespace of the value.
+        :type namespace: str
+        :param alias: Key or alias of the value.
+        :type alias: Any
+
+        :return: The value, or None if it is not stored, expired, or the store failed.
+        :rtype: Optional[bytes]
+        """
+
+        return await self._run(self._get, namespace, str(alias))
+
+    async def put(
+        self,
+        namespace: str,
+        key: Any,
+        value: bytes,
+        ttl: float,
+        aliases: Iterable[Any] = (),
+    ) -> None:
+        """
+        Store (or replace) a value under its key, reachable through `aliases`.
+
+        :param namespace: Namespace of the value.
+        :type namespace: str
+        :param key: Key of the value.
+        :type key: Any
+        :param value: Value to store.
+        :type value: bytes
+        :param ttl: Seconds after which the value expires.
+        :type ttl: float
+        :param aliases: Alternative keys of the value. Aliases of a previous version of the value that are
+                        not repeated here stop resolving.
+        :type aliases: Iterable[Any]
+        """
+
+        await self.put_many(namespace, [(key, value, aliases)], ttl)
+
+    async def put_many(
+        self,
+        namespace: str,
+        entries: Iterable[tuple[Any, bytes, Iterable[Any]]],
+        ttl: float,
+    ) -> None:
+        """
+        Store (or replace) several values at once, in a single transaction.
+
+        :param namespace: Namespace of the values.
+        :type namespace: str
+        :param entries: Key, value and aliases of every value, as for :meth:`put`.
+        :type entries: Iterable[tuple[Any, bytes, Iterable[Any]]]
+        :param ttl: Seconds after which the values expire.
+        :type ttl: float
+        """
+
+        rows = [
+            (str(key), value, {str(alias) for alias in (key, *aliases)})
+            for key, value, aliases in entries
+        ]
+
+        if rows:
+            await self._run(self._put, namespace, rows, time.time() + ttl)
+
+    async def delete(self, namespace: str, alias: Any) -> None:
+        """
+        Delete the value reachable through `alias`, along with all of its other aliases.
+
+        :param namespace: Namespace of the value.
+        :type namespace: str
+        :param alias: Key or alias of the value.
+        :type alias: Any
+        """
+
+        await self.delete_many(namespace, [alias])
+
+    async def delete_many(self, namespace: str, aliases: Iterable[Any]) -> None:
+        """
+        Delete several values at once, in a single transaction.
+
+        :param namespace: Namespace of the values.
+        :type namespace: str
+        :param aliases: Key or alias of every value.
+        :type aliases: Iterable[Any]
+        """
+
+        aliases = [str(alias) for alias in aliases]
+
+        if aliases:
+            await self._run(self._delete, namespace, aliases)
+
+    async def retain(self, namespace: str, keys: Iterable[Any]) -> None:
+        """
+        Delete every value of a namespace, except the values stored under `keys`.
+
+        :param namespace: Namespace of the values.
+        :type namespace: str
+        :param keys: Keys of the values to keep.
+        :type keys: Iterable[Any]
+        """
+
+        await self._run(self._retain, namespace, {str(key) for key in keys})
+
+    async def purge(self) -> None:
+        """Delete the expired values, and the aliases left without a value."""
+
+        await self._run(self._purge)
+
+    def close(self) -> None:
+        """Wait for the pending calls, then close the database."""
+
+        self._executor.shutdown(wait=True)
+        self._connection.close()
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> Optional[T]:
+        loop = asyncio.get_running_loop()
+
+        try:
+            return await loop.run_in_executor(self._executor, func, *args)
+        except sqlite3.Error as error:
+            _log.warning("Disk store %s failed: %r", self.path, error)
+            return None
+
+    def _get(self, namespace: str, alias: str) -> Optional[bytes]:
+        row = self._connection.execute(
+            "SELECT entries.value FROM aliases JOIN entries"
+            " ON entries.namespace = aliases.namespace AND entries.key = aliases.key"
+            " WHERE aliases.namespace = ? AND aliases.alias = ? AND entries.expires_at > ?",
+            (namespace, alias, time.time()),
+        ).fetchone()
+
+        return None if row is None else row[0]
+
+    def _put(
+        self,
+        namespace: str,
+        rows: list[tuple[str, bytes, set[str]]],
+        expires_at: float,
+    ) -> None:
+        with self._transaction():
+            self._connection.executemany(
+                "DELETE FROM aliases WHERE namespace = ? AND key = ?",
+                [(namespace, key) for key, _, _ in rows],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO aliases (namespace, alias, key) VALUES (?, ?, ?)",
+                [
+                    (namespace, alias, key)
+                    for key, _, aliases in rows
+                    for alias in aliases
+                ],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                [(namespace, key, value, expires_at) for key, value, _ in rows],
+            )
+
+    def _delete(self, namespace: str, aliases: list[str]) -> None:
+        with self._transaction():
+            keys = [
+                (namespace, row[0])
+                for alias in aliases
+                for row in self._connection.execute(
+                    "SELECT key FROM aliases WHERE namespace = ? AND alias = ?",
+                    (namespace, alias),
+                )
+            ]
+
+            self._connection.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", keys
+            )
+            self._connection.executemany(
+                "DELETE FROM aliases WHERE namespace = ? AND key = ?", keys
+            )
+
+    def _retain(self, namespace: str, keys: set[str]) -> None:
+        with self._transaction():
+            stored = self._connection.execute(
+                "SELECT key FROM entries WHERE namespace = ?", (namespace,)
+            )
+            removed = [(namespace, key) for key, in stored if key not in keys]
+
+            self._connection.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", removed
+            )
+            self._connection.executemany(
+                "DELETE FROM aliases WHERE namespace = ? AND key = ?", removed
+            )
+
+    def _purge(self) -> None:
+        with self._transaction():
+            self._connection.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            )
+            self._connection.execute(
+                "DELETE FROM aliases WHERE NOT EXISTS (SELECT 1 FROM entries"
+                " WHERE entries.namespace = aliases.namespace AND entries.key = aliases.key)"
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Context manager running a write transaction, taking the write lock upfront."""
+
+        self._connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        else:
+            self._connection.execute("COMMIT")
+
+    def __repr__(self) -> str:
+        return f"<DiskStore path={self.path!r}>"
@@ -0,0 +1,336 @@
+"""A bus carrying cache invalidations between the instances and workers of the API."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, NamedTuple, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from .backoff import ExponentialBackoff
+
+_log = logging.getLogger(__name__)
+
+# fmt: off
+__all__ = (
+    'Invalidation',
+    'InvalidationBus',
+    'InvalidationTransport',
+    'LocalTransport',
+    'MongoTransport',
+)
+# fmt: on
+
+# Tailing resumes this far before the last message received, to account for clock skew between publishers.
+# Invalidations are idempotent, receiving a message twice is harmless.
+RESUME_OVERLAP = timedelta(seconds=30)
+
+
+class Invalidation(NamedTuple):
+    """A message invalidating the cached copies of an entity, after it was written to the database."""
+
+    # Kind of entity, such as "student" or "event".
+    entity: str
+    # Key of the entity, as a string.
+    key: str
+    # Sort year of the entity, for entities cached per year.
+    year: Optional[str] = None
+    # Identifier of the bus that published the message.
+    origin: str = ""
+
+
+class InvalidationTransport(ABC):
+    """
+    Carries invalidations between buses.
+
+    Every message published through a transport is received by every subscriber of every transport
+    connected to the same channel, including the subscribers of the publishing transport.
+    """
+
+    async def start(self) -> None:
+        """Prepare the transport, before anything is published or received."""
+
+    @abstractmethod
+    async def publish(self, message: Invalidation) -> None:
+        """
+        Publish a message to every subscriber.
+
+        :param message: Message to publish.
+        :type message: Invalidation
+        """
+
+    @abstractmethod
+    def subscribe(self) -> AsyncIterator[Invalidation]:
+        """
+        Receive the messages published from now on, until the iterator is closed.
+
+        :return: An iterator over the received messages.
+        :rtype: AsyncIterator[Invalidation]
+        """
+
+    async def close(self) -> None:
+        """Release the resources of the transport."""
+
+
+class MongoTransport(InvalidationTransport):
+    """
+    A transport over a capped collection, shared by every instance using the same database.
+
+    Messages are inserted into the collection and received by tailing it. The collection is capped, so old
+    messages are dropped without ever being cleaned up.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        name: str = "cache_invalidations",
+        size: int = 1024 * 1024,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Initialize the transport.
+
+        :param db: Database holding the collection.
+        :type db: AsyncIOMotorDatabase
+        :param name: Name of the capped collection, created if it does not exist.
+        :type name: str
+        :param size: Size of the capped collection in bytes, when it is created.
+        :type size: int
+        :param poll_interval: Seconds waited before tailing again, once the cursor is exhausted or lost.
+        :type poll_interval: float
+        """
+
+        self.db = db
+        self.name = name
+        self.size = size
+        self.poll_interval = poll_interval
+
+    async def start(self) -> None:
+        try:
+            await self.db.create_collection(self.name, capped=True, size=self.size)
+        except CollectionInvalid:
+            # Created by another instance.
+            pass
+        except PyMongoError as error:
+            # Tailing retries until the collection is reachable.
+            _log.warning("Creating %s failed: %r", self.name, error)
+
+    async def publish(self, message: Invalidation) -> None:
+        await self.db[self.name].insert_one(message._asdict())
+
+    async def subscribe(self) -> AsyncIterator[Invalidation]:
+        collection = self.db[self.name]
+        since = datetime.now(timezone.utc) - RESUME_OVERLAP
+        backoff = ExponentialBackoff()
+
+        while True:
+            try:
+                cursor = collection.find(
+                    {"_id": {"$gte": ObjectId.from_datetime(since)}},
+                    cursor_type=CursorType.TAILABLE_AWAIT,
+                )
+
+                # A tailable cursor stays open at the end of the collection, waiting for new messages. It is
+                # closed by the server if the collection is empty, or if it was overwritten past the cursor.
+                while cursor.alive:
+                    async for document in cursor:
+                        since = document["_id"].generation_time - RESUME_OVERLAP
+
+                        try:
+                            message = Invalidation(
+                                entity=document["entity"],
+                                key=document["key"],
+                                year=document.get("year"),
+                                origin=document.get("origin", ""),
+                            )
+                        except KeyError as error:
+                            _log.warning("Ignoring invalid invalidation: %r", error)
+                            continue
+
+                        yield message
+
+                    await asyncio.sleep(self.poll_interval)
+            except PyMongoError as error:
+                delay = backoff.delay()
+                _log.warning(
+                    "Tailing %s failed, retrying in %.2fs: %r", self.name, delay, error
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            await asyncio.sleep(self.poll_interval)
+
+    def __repr__(self) -> str:
+        return f"<MongoTransport collection={self.name!r}>"
+
+
+class LocalTransport(InvalidationTransport):
+    """
+    An in-process transport, connecting every transport of the same channel within the process.
+
+    Meant for tests and single process deployments, messages never leave the process.
+    """
+
+    _channels: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def __init__(self, channel: str = "default"):
+        """
+        Initialize the transport.
+
+        :param channel: Name of the channel, transports only reach the transports of the same channel.
+        :type channel: str
+        """
+
+        self.channel = channel
+
+    async def publish(self, message: Invalidation) -> None:
+        for queue in self._channels[self.channel]:
+            queue.put_nowait(message)
+
+    async def subscribe(self) -> AsyncIterator[Invalidation]:
+        queue: asyncio.Queue[Invalidation] = asyncio.Queue()
+        self._channels[self.channel].add(queue)
+
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._channels[self.channel].discard(queue)
+
+    def __repr__(self) -> str:
+        return f"<LocalTransport channel={self.channel!r}>"
+
+
+class InvalidationBus:
+    """
+    Publishes the invalidations of a process, and hands the invalidations published by the other processes
+    to its handlers.
+
+    Publishing never blocks nor fails the caller, messages are sent in the background and failures are
+    logged. Messages published by the bus itself are not handed to its handlers, the publisher is expected
+    to have applied them already.
+    """
+
+    def __init__(self, transport: InvalidationTransport, origin: Optional[str] = None):
+        """
+        Initialize the bus.
+
+        :param transport: Transport carrying the messages.
+        :type transport: InvalidationTransport
+        :param origin: Identifier of the bus, unique across every process. Defaults to the host name and
+                       process ID, along with a random suffix.
+        :type origin: Optional[str]
+        """
+
+        self.transport = transport
+        self.origin = origin or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+        self.published = 0
+        self.received = 0
+        self.failed = 0
+
+        self._handlers: list[Callable[[Invalidation], Any]] = []
+        self._listener: Optional[asyncio.Task] = None
+        self._publishing: set[asyncio.Task] = set()
+
+    def subscribe(self, handler: Callable[[Invalidation], Any]) -> None:
+        """
+        Register a handler, called with every message published by the other buses.
+
+        :param handler: Handler of the messages, its exceptions are logged.
+        :type handler: Callable[[Invalidation], Any]
+        """
+
+        self._handlers.append(handler)
+
+    async def start(self) -> None:
+        """Start the transport, and receiving messages in the background."""
+
+        await self.transport.start()
+        self._listener = asyncio.create_task(self._listen())
+
+    def publish(self, entity: str, key: Any, year: Any = None) -> None:
+        """
+        Publish an invalidation in the background.
+
+        :param entity: Kind of the entity.
+        :type entity: str
+        :param key: Key of the entity.
+        :type key: Any
+        :param year: Sort year of the entity, for entities cached per year.
+        :type year: Any
+        """
+
+        message = Invalidation(
+            entity=entity,
+            key=str(key),
+            year=None if year is None else str(year),
+            origin=self.origin,
+        )
+
+        task = asyncio.create_task(self.transport.publish(message))
+        self._publishing.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task):
+        self._publishing.discard(task)
+
+        if task.cancelled():
+            return
+
+        if task.exception() is not None:
+            self.failed += 1
+            _log.warning("Publishing an invalidation failed: %r", task.exception())
+        else:
+            self.published += 1
+
+    async def _listen(self):
+        async for message in self.transport.subscribe():
+            if message.origin == self.origin:
+                continue
+
+            self.received += 1
+
+            for handler in self._handlers:
+                try:
+                    handler(message)
+                except Exception as error:
+                    _log.exception("Handling %r failed: %r", message, error)
+
+    async def close(self) -> None:
+        """Wait for the messages being published, stop receiving messages, then close the transport."""
+
+        if self._publishing:
+            await asyncio.wait(self._publishing)
+
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+        await self.transport.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the number of messages published, received from other buses, and failed to publish."""
+
+        return {
+            "origin": self.origin,
+            "transport": repr(self.transport),
+            "published": self.published,
+            "received": self.received,
+            "failed": self.failed,
+        }
+
+    def __repr__(self) -> str:
+        return f"<InvalidationBus origin={self.origin!r} transport={self.transport!r}>"
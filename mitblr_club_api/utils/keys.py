@@ -0,0 +1,322 @@
+"""Keys signing and verifying the JSON Web Tokens issued by the API, identified by their key ID (`kid`)."""
+from __future__ import annotations
+
+import base64
+import hashlib
+import logging
+import os
+from typing import Any, Iterable, NamedTuple, Optional
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from jwt import InvalidKeyError, InvalidTokenError
+
+_log = logging.getLogger(__name__)
+
+# fmt: off
+__all__ = (
+    'Key',
+    'KeyManager',
+    'load_key',
+    'ALGORITHMS',
+)
+# fmt: on
+
+# Algorithms tokens can be signed with, by type of key. Ed25519 (EdDSA) and P-256 (ES256) keys sign tokens
+# several times faster than RSA (RS256) keys and make them smaller, RSA keys verify them slightly faster.
+ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+
+class Key(NamedTuple):
+    """A parsed key, along with the algorithm it signs tokens with."""
+
+    kid: str
+    algorithm: str
+    # Public half of the key, verifying tokens.
+    public: Any
+    # Private half of the key, signing tokens, None for keys only verifying tokens.
+    private: Optional[Any] = None
+
+
+def _algorithm(public: Any) -> str:
+    """Algorithm of the tokens signed with a key, from the type of the key."""
+
+    if isinstance(public, rsa.RSAPublicKey):
+        return "RS256"
+
+    if isinstance(public, ed25519.Ed25519PublicKey):
+        return "EdDSA"
+
+    if isinstance(public, ec.EllipticCurvePublicKey) and isinstance(
+        public.curve, ec.SECP256R1
+    ):
+        return "ES256"
+
+    raise ValueError(f"Unsupported key type: {type(public).__name__}")
+
+
+def _thumbprint(public: Any) -> str:
+    """Key ID derived from the public key, the same on every instance sharing the key."""
+
+    der = public.public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return base64.urlsafe_b64encode(hashlib.sha256(der).digest()[:12]).decode()
+
+
+def load_key(data: bytes, kid: Optional[str] = None) -> Key:
+    """
+    Parse a PEM encoded private or public key.
+
+    :param data: PEM encoded key.
+    :type data: bytes
+    :param kid: Key ID, defaults to a thumbprint of the public key.
+    :type kid: Optional[str]
+
+    :return: The parsed key, able to sign tokens if it is a private key.
+    :rtype: Key
+
+    :raises ValueError: If the key could not be parsed, or is of an unsupported type.
+    """
+
+    private = None
+
+    if b"PRIVATE KEY" in data:
+        private = serialization.load_pem_private_key(data, password=None)
+        public = private.public_key()
+    else:
+        public = serialization.load_pem_public_key(data)
+
+    return Key(
+        kid=kid or _thumbprint(public),
+        algorithm=_algorithm(public),
+        public=public,
+        private=private,
+    )
+
+
+class KeyManager:
+    """
+    Signs tokens with the active key, and verifies them with the key named by their `kid` header.
+
+    Keys are parsed once, when they are loaded, so signing and verifying never parse PEM. Keys can be rotated
+    without invalidating the tokens already issued: a new key is made active while the previous keys keep
+    verifying the tokens they signed, until they are retired.
+
+    The algorithm of a token is the algorithm of its key, so migrating to another algorithm is a rotation to
+    a key of another type. Tokens of both algorithms are accepted during the rollout, until the previous
+    algorithm is no longer accepted.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[Key],
+        active: str,
+        retired: Iterable[str] = (),
+        algorithms: Iterable[str] = ALGORITHMS,
+    ):
+        """
+        Initialize the manager.
+
+        :param keys: Keys signing or verifying tokens.
+        :type keys: Iterable[Key]
+        :param active: Key ID of the key signing new tokens, it must be a private key.
+        :type active: str
+        :param retired: Key IDs of the keys no longer verifying tokens.
+        :type retired: Iterable[str]
+        :param algorithms: Algorithms of the tokens accepted, the keys of other algorithms are ignored.
+        :type algorithms: Iterable[str]
+
+        :raises ValueError: If the active key is missing, retired, of an algorithm not accepted, or unable to
+                            sign tokens.
+        """
+
+        self.retired = frozenset(retired)
+        self.algorithms = frozenset(algorithms)
+
+        unsupported = self.algorithms.difference(ALGORITHMS)
+        if unsupported:
+            raise ValueError(f"Unsupported algorithms: {sorted(unsupported)}")
+
+        self._keys = {
+            key.kid: key
+            for key in keys
+            if key.kid not in self.retired and key.algorithm in self.algorithms
+        }
+
+        key = self._keys.get(active)
+        if key is None or key.private is None:
+            raise ValueError(f"No private key {active!r} to sign tokens with.")
+
+        self.active = key
+
+    @classmethod
+    def from_directory(
+        cls,
+        path: str,
+        active: Optional[str] = None,
+        retired: Iterable[str] = (),
+        algorithm: Optional[str] = None,
+        algorithms: Iterable[str] = ALGORITHMS,
+    ) -> KeyManager:
+        """
+        Load every `<kid>.pem` file of a directory, holding either a private or a public key.
+
+        Public keys only verify tokens, such as the tokens signed by another instance, or by a key whose
+        private half was discarded.
+
+        :param path: Directory of the keys.
+        :type path: str
+        :param active: Key ID of the key signing new tokens. Defaults to the last private key, by key ID, so
+                       date based key IDs (e.g. `2024-01`) make the newest key active.
+        :type active: Optional[str]
+        :param retired: Key IDs of the keys no longer verifying tokens, they are not loaded.
+        :type retired: Iterable[str]
+        :param algorithm: Algorithm new tokens are signed with, the default active key is the last private key
+                          of this algorithm. Defaults to any accepted algorithm.
+        :type algorithm: Optional[str]
+        :param algorithms: Algorithms of the tokens accepted.
+        :type algorithms: Iterable[str]
+
+        :return: The key manager.
+        :rtype: KeyManager
+
+        :raises ValueError: If a key could not be parsed, or no key can sign tokens.
+        """
+
+        retired = frozenset(retired)
+        algorithms = frozenset(algorithms)
+        keys = []
+
+        for name in sorted(os.listdir(path)):
+            kid, extension = os.path.splitext(name)
+
+            if extension != ".pem" or kid in retired:
+                continue
+
+            with open(os.path.join(path, name), "rb") as file:
+                keys.append(load_key(file.read(), kid))
+
+        if active is None:
+            signing = [
+                key.kid
+                for key in keys
+                if key.private is not None
+                and key.algorithm in algorithms
+                and key.algorithm == (algorithm or key.algorithm)
+            ]
+            active = signing[-1] if signing else ""
+
+        _log.info("Loaded keys %s, signing with %r", [key.kid for key in keys], active)
+        manager = cls(keys, active, retired, algorithms)
+
+        if algorithm is not None and manager.active.algorithm != algorithm:
+            raise ValueError(f"Key {active!r} does not sign tokens with {algorithm}.")
+
+        return manager
+
+    @classmethod
+    def from_files(
+        cls, private_path: str, public_path: Optional[str] = None
+    ) -> KeyManager:
+        """
+        Load a single key pair, the key ID being a thumbprint of the public key.
+
+        :param private_path: PEM file of the private key.
+        :type private_path: str
+        :param public_path: PEM file of the public key, which must match the private key. Defaults to the
+                            public half of the private key.
+        :type public_path: Optional[str]
+
+        :return: The key manager.
+        :rtype: KeyManager
+
+        :raises ValueError: If a key could not be parsed, or the keys do not match.
+        """
+
+        with open(private_path, "rb") as file:
+            key = load_key(file.read())
+
+        if public_path is not None:
+            with open(public_path, "rb") as file:
+                if load_key(file.read()).kid != key.kid:
+                    raise ValueError(f"{public_path} does not match {private_path}.")
+
+        return cls([key], key.kid)
+
+    @property
+    def kids(self) -> list[str]:
+        """Key IDs of the keys verifying tokens."""
+
+        return list(self._keys)
+
+    def sign(self, claims: dict[str, Any]) -> str:
+        """
+        Sign a token with the active key, naming it in the `kid` header.
+
+        :param claims: Claims of the token.
+        :type claims: dict[str, Any]
+
+        :return: The encoded token.
+        :rtype: str
+        """
+
+        return jwt.encode(
+            claims,
+            self.active.private,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+        )
+
+    def key_for(self, token: str) -> Key:
+        """
+        Find the key which signed a token, without verifying the token.
+
+        Tokens without a `kid` header, issued before keys were named, are verified with the active key.
+
+        :param token: Encoded token.
+        :type token: str
+
+        :return: The key verifying the token.
+        :rtype: Key
+
+        :raises jwt.InvalidTokenError: If the token is malformed, or its key is unknown or retired.
+        """
+
+        kid = jwt.get_unverified_header(token).get("kid")
+
+        if kid is None:
+            return self.active
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"Unknown or retired key {kid!r}")
+
+        return key
+
+    def decode(self, token: str, **options: Any) -> dict[str, Any]:
+        """
+        Verify a token with the key named by its `kid` header and return its claims.
+
+        :param token: Encoded token.
+        :type token: str
+        :param options: Further arguments of :func:`jwt.decode`, such as `leeway`.
+        :type options: Any
+
+        :return: The claims of the token.
+        :rtype: dict[str, Any]
+
+        :raises jwt.InvalidTokenError: If the token is invalid, immature, expired or signed by an unknown key.
+        """
+
+        key = self.key_for(token)
+
+        try:
+            return jwt.decode(token, key.public, algorithms=[key.algorithm], **options)
+        except InvalidKeyError as error:
+            # A key of another type than the header's algorithm.
+            raise InvalidTokenError(str(error)) from error
+
+    def __repr__(self) -> str:
+        return f"<KeyManager active={self.active.kid!r} kids={self.kids}>"
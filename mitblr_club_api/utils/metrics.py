@@ -0,0 +1,110 @@
+"""Counters and latency histograms describing the behaviour of the caches."""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence
+
+# fmt: off
+__all__ = (
+    'CacheMetrics',
+    'LatencyHistogram',
+)
+# fmt: on
+
+# Upper bounds (in seconds) of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class LatencyHistogram:
+    """A histogram of latencies with fixed bucket boundaries, counting observations per bucket."""
+
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # The last count is for the latencies above the largest bucket.
+        self.counts: list[int] = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Record a latency.
+
+        :param seconds: The latency, in seconds.
+        :type seconds: float
+        """
+
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serialisable view of the histogram.
+
+        :return: The number of observations per bucket (keyed by upper bound), their count and their sum.
+        :rtype: dict
+        """
+
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+
+        return {
+            "buckets": dict(zip(bounds, self.counts)),
+            "count": self.count,
+            "sum": self.total,
+        }
+
+
+class CacheMetrics:
+    """Hit, miss, eviction and load latency metrics of a single cache."""
+
+    __slots__ = ("hits", "misses", "evictions", "expirations", "rejections", "loads")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.hits: int = 0
+        self.misses: int = 0
+        # Entries removed to make room for others, and entries removed after outliving their TTL.
+        self.evictions: int = 0
+        self.expirations: int = 0
+        # New entries not admitted by a frequency aware cache.
+        self.rejections: int = 0
+        self.loads: LatencyHistogram = LatencyHistogram(buckets)
+
+    @contextmanager
+    def time_load(self) -> Iterator[None]:
+        """Context manager recording the duration of a load from the database."""
+
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.loads.observe(time.perf_counter() - start)
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        """Ratio of the lookups which were hits, None if there were no lookups."""
+
+        lookups = self.hits + self.misses
+        return None if lookups == 0 else self.hits / lookups
+
+    def snapshot(self) -> dict:
+        """
+        Get a JSON serialisable view of the metrics.
+
+        :return: The counters and the load latency histogram.
+        :rtype: dict
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "rejections": self.rejections,
+            "load_seconds": self.loads.snapshot(),
+        }
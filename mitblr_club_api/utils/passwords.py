@@ -0,0 +1,264 @@
+"""Hashing and checking of passwords and automation tokens on a bounded pool of threads."""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+import bcrypt
+from cachetools import TTLCache
+
+from .metrics import LatencyHistogram
+
+T = TypeVar("T")
+
+# fmt: off
+__all__ = (
+    'HasherBusy',
+    'PasswordHasher',
+    'PoolFull',
+    'Throttled',
+)
+# fmt: on
+
+# Upper bounds (in seconds) of the histogram buckets of the time spent queued and hashing.
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Assumed duration of a hash, until one was measured.
+DEFAULT_HASH_SECONDS = 0.25
+
+
+class HasherBusy(Exception):
+    """Raised when a hash is refused rather than queued, it may be retried after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class PoolFull(HasherBusy):
+    """Raised when the queue of the pool is full."""
+
+
+class Throttled(HasherBusy):
+    """Raised when an identifier failed too many checks recently, or is already being checked."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded pool of threads, so hashing never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so the threads hash in parallel. Hashes beyond the capacity of the
+    pool wait in a queue of bounded depth, past which they are refused with :class:`PoolFull`.
+
+    Checks are throttled per identifier (such as a username): an identifier is checked once at a time, and
+    is refused with :class:`Throttled` once it failed `max_failures` checks within `failure_window` seconds,
+    so repeated bad passwords can not monopolize the pool.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: int = 32,
+        max_failures: int = 5,
+        failure_window: float = 300,
+        max_identifiers: int = 10_000,
+    ):
+        """
+        Initialize the hasher.
+
+        :param workers: Number of threads hashing, defaults to the number of CPUs (at most 4).
+        :type workers: Optional[int]
+        :param max_queue: Number of hashes waiting for a thread, past which hashes are refused.
+        :type max_queue: int
+        :param max_failures: Number of failed checks of an identifier after which it is throttled.
+        :type max_failures: int
+        :param failure_window: Seconds after the last failed check of an identifier its failures are
+                               forgotten.
+        :type failure_window: float
+        :param max_identifiers: Number of identifiers whose failures are remembered.
+        :type max_identifiers: int
+        """
+
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.max_failures = max_failures
+        self.failure_window = failure_window
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="bcrypt"
+        )
+
+        # Hashes submitted and not finished yet, and those of them being hashed by a thread.
+        self._pending = 0
+        self._running = 0
+        self._running_lock = threading.Lock()
+
+        # Identifiers being checked, and the failure count and time of the last failure of every identifier.
+        self._checking: set[str] = set()
+        self._failures: TTLCache = TTLCache(maxsize=max_identifiers, ttl=failure_window)
+
+        self.completed = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+        self.waits = LatencyHistogram(HASH_BUCKETS)
+        self.hashes = LatencyHistogram(HASH_BUCKETS)
+
+    async def hashpw(self, password: bytes) -> bytes:
+        """
+        Hash a password with a new salt.
+
+        :param password: The password.
+        :type password: bytes
+
+        :return: The hash of the password.
+        :rtype: bytes
+
+        :raises PoolFull: If the queue of the pool is full.
+        """
+
+        return await self._submit(bcrypt.hashpw, password, bcrypt.gensalt())
+
+    async def checkpw(self, password: bytes, hashed: bytes, identifier: str) -> bool:
+        """
+        Check a password against its hash.
+
+        :param password: The password.
+        :type password: bytes
+        :param hashed: The hash of the expected password.
+        :type hashed: bytes
+        :param identifier: Identifier the password belongs to, throttled separately from the others.
+        :type identifier: str
+
+        :return: True if the password matches the hash, else False.
+        :rtype: bool
+
+        :raises Throttled: If the identifier is throttled.
+        :raises PoolFull: If the queue of the pool is full.
+        """
+
+        self._check_throttle(identifier)
+        self._checking.add(identifier)
+
+        try:
+            matched = await self._submit(bcrypt.checkpw, password, hashed)
+        finally:
+            self._checking.discard(identifier)
+
+        if matched:
+            self._failures.pop(identifier, None)
+        else:
+            failures, _ = self._failures.get(identifier, (0, 0.0))
+            self._failures[identifier] = (failures + 1, time.monotonic())
+
+        return matched
+
+    def close(self) -> None:
+        """Stop the threads, cancelling the queued hashes."""
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _check_throttle(self, identifier: str) -> None:
+        """Raises :class:`Throttled` if the identifier may not be checked now."""
+
+        if identifier in self._checking:
+            self.throttled += 1
+            raise Throttled(f"{identifier} is already being checked.", 1)
+
+        failures, last = self._failures.get(identifier, (0, 0.0))
+
+        if failures >= self.max_failures:
+            self.throttled += 1
+            raise Throttled(
+                f"{identifier} failed {failures} checks.",
+                last + self.failure_window - time.monotonic(),
+            )
+
+    async def _submit(self, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PoolFull("The password hashing queue is full.", self._drain_time())
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+
+        try:
+            result, waited, elapsed = await loop.run_in_executor(
+                self._executor, self._run, time.perf_counter(), func, *args
+            )
+        finally:
+            self._pending -= 1
+
+        self.completed += 1
+        self.busy_seconds += elapsed
+        self.waits.observe(waited)
+        self.hashes.observe(elapsed)
+
+        return result
+
+    def _run(
+        self, submitted: float, func: Callable[..., T], *args: Any
+    ) -> tuple[T, float, float]:
+        """Runs in a thread of the pool, returns the result along with the seconds queued and hashing."""
+
+        start = time.perf_counter()
+
+        with self._running_lock:
+            self._running += 1
+
+        try:
+            result = func(*args)
+        finally:
+            with self._running_lock:
+                self._running -= 1
+
+        return result, start - submitted, time.perf_counter() - start
+
+    def _drain_time(self) -> float:
+        """Estimated seconds until the queued hashes are done."""
+
+        mean = (
+            self.hashes.total / self.hashes.count
+            if self.hashes.count
+            else DEFAULT_HASH_SECONDS
+        )
+        return self._pending * mean / self.workers
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Get a JSON serialisable view of the utilisation of the pool.
+
+        :return: The size, current load and cumulative utilisation of the pool, the counters of completed,
+                 refused and throttled hashes, and the histograms of the time spent queued and hashing.
+        :rtype: dict[str, Any]
+        """
+
+        uptime = time.monotonic() - self.started
+
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": max(0, self._pending - self._running),
+            "max_queue": self.max_queue,
+            "utilisation": self._running / self.workers,
+            "busy_ratio": self.busy_seconds / (self.workers * uptime)
+            if uptime
+            else 0.0,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "throttled_identifiers": sum(
+                failures >= self.max_failures for failures, _ in self._failures.values()
+            ),
+            "wait_seconds": self.waits.snapshot(),
+            "hash_seconds": self.hashes.snapshot(),
+        }
+
+    def __repr__(self) -> str:
+        return f"<PasswordHasher workers={self.workers} max_queue={self.max_queue}>"
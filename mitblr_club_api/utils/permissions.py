@@ -1,30 +1,79 @@
 """
 Permission management and scoping for all classes.
 """
-from enum import Enum
+from typing import Optional
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
 from sanic.log import logger
 
+from mitblr_club_api.models.cache_tup import Cache
+from mitblr_club_api.models.cached.team import TeamCache
+from mitblr_club_api.models.enums.permission import Permission
 from mitblr_club_api.models.exceptions import ClubTeamNotFoundException
-from mitblr_club_api.models.internal.team import Team
 
 
-class Permission(Enum):
-    """All permissions within the database as enum strings and all permissions."""
+def has_permission(team: Optional[TeamCache], permission: Permission) -> bool:
+    """
+    Check the permissions granted to a club team member, without querying the database.
+
+    :param team: Cached club team member, None if the caller is not a club team member.
+    :type team: Optional[TeamCache]
+    :param permission: Permissions to check for, all of them must be granted.
+    :type permission: Permission
+
+    :return: True if the member has API access and is granted every permission; else False.
+    :rtype: bool
+    """
+
+    return team is not None and team.api_access and permission in team.grants
+
+
+def permission_claims(team: TeamCache) -> dict:
+    """
+    Get the claims scoping a token to the club and permissions of a club team member.
+
+    Tokens carrying these claims are authorized without the club team member, as long as its permission
+    version (incremented by hand whenever its permissions change, see MongoDB.md) still matches
+    `perm_version`.
+
+    :param team: Cached club team member the token is issued to.
+    :type team: TeamCache
+
+    :return: The club slug, permission bitmask and permission version claims.
+    :rtype: dict
+    """
+
+    return {
+        "club": team.club,
+        "perms": int(team.grants) if team.api_access else 0,
+        "perm_version": team.perm_version,
+    }
 
-    CREATE_EVENT = "create_event"
-    MODIFY_EVENT = "modify_event"
-    DELETE_EVENT = "delete_event"
-    GET_EVENT = "get_event"
-    MARK_ATTENDANCE = "mark_attendance"
-    MODIFY_ATTENDANCE = "modify_attendance"
-    ALL = "all"
+
+def automation_permissions(document: dict) -> Permission:
+    """
+    Get the permissions granted to an automation client.
+
+    :param document: Document of the client from the `authentication` collection.
+    :type document: dict
+
+    :return: The permissions of its `permissions` field, every permission of the clubs (`ALL`) if missing.
+    :rtype: Permission
+    """
+
+    if "permissions" not in document:
+        # Automation clients were granted everything before permissions were checked.
+        return Permission.ALL
+
+    return Permission.from_document(document["permissions"])
 
 
 async def check_permission(
-    collection: AsyncIOMotorCollection, student_id: ObjectId, permission: Permission
+    collection: AsyncIOMotorCollection,
+    student_id: ObjectId,
+    permission: Permission,
+    cache: Optional[Cache] = None,
 ) -> bool:
     """
     Check the permissions given to a student within the club teams.
@@ -35,6 +84,8 @@ async def check_permission(
     :type student_id: ObjectId
     :param permission: Permissions to check for the club teams.
     :type permission: Permission
+    :param cache: Cache the club teams are read through, dropped when the student or its teams change.
+    :type cache: Optional[Cache]
 
     :raises ClubTeamNotFoundException: When no club team with the given `student_id` exists.
 
@@ -42,7 +93,18 @@ async def check_permission(
     :rtype: bool
     """
 
-    club_teams = await collection.find({"student_id": student_id}).to_list(length=5)
+    if cache is None:
+        club_teams = await collection.find({"student_id": student_id}).to_list(length=5)
+    else:
+        club_teams = await cache.find(
+            collection.name,
+            {"student_id": student_id},
+            tags=lambda teams: [
+                f"student:{student_id}",
+                *(f"team:{team['_id']}" for team in teams),
+            ],
+            length=5,
+        )
 
     if len(club_teams) == 0:
         raise ClubTeamNotFoundException(
@@ -54,15 +116,4 @@ async def check_permission(
             f"The club team does not refer to a unique student ID. Got {len(club_teams)} number of records."
         )
 
-    for key, value in club_teams[0].items():
-        if type(value) is ObjectId:
-            club_teams[0][key] = str(value)
-
-    club_team = Team(**club_teams[0])
-
-    match permission:
-        case Permission.ALL:
-            return all(club_team.permissions.values())
-
-        case _:
-            return club_team.permissions[permission.value]
+    return permission in TeamCache.from_document(club_teams[0]).grants
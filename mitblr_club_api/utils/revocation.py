@@ -0,0 +1,242 @@
+"""Revocation of issued JSON Web Tokens, by token (`jti`) or by authentication (`auth_id`)."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from .invalidation import Invalidation, InvalidationBus
+
+_log = logging.getLogger(__name__)
+
+# fmt: off
+__all__ = (
+    'RevocationList',
+)
+# fmt: on
+
+# Syncs read the revocations inserted this long before the last one read, to account for clock skew
+# between the instances inserting them. Reading a revocation twice is harmless.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+# Every this many syncs, the revocations are reloaded whole, so the expired ones are forgotten.
+FULL_SYNC_INTERVAL = 360
+
+
+class RevocationList:
+    """
+    The revoked tokens and authentications, synced from a collection into in-memory maps.
+
+    A token is revoked if its `jti` was revoked, or if its `auth_id` was revoked after the token was issued
+    (its `iat`), so revoking an authentication logs it out without preventing it from logging in again.
+
+    Checking a token is a dictionary lookup per claim, with nothing to do while no token is revoked.
+    Revocations expire along with the tokens they revoke, the collection drops them through a TTL index.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        name: str = "revocations",
+        max_token_age: timedelta = timedelta(days=1),
+        bus: Optional[InvalidationBus] = None,
+    ):
+        """
+        Initialize the revocation list.
+
+        :param db: Database holding the collection.
+        :type db: AsyncIOMotorDatabase
+        :param name: Name of the collection of revocations.
+        :type name: str
+        :param max_token_age: Longest validity of the tokens issued, after which a revoked authentication
+                              has no valid token left.
+        :type max_token_age: timedelta
+        :param bus: Bus telling the other instances to sync as soon as a token is revoked.
+        :type bus: Optional[InvalidationBus]
+        """
+
+        self.db = db
+        self.name = name
+        self.max_token_age = max_token_age
+        self.bus = bus
+
+        # Time of the revocation (as a timestamp), by revoked `jti` and by revoked `auth_id`.
+        self._tokens: dict[str, float] = {}
+        self._auths: dict[str, float] = {}
+        self._since: Optional[datetime] = None
+        self._syncs = 0
+        self._syncing: Optional[asyncio.Task] = None
+
+        self.checks = 0
+        self.revoked = 0
+
+        if bus is not None:
+            bus.subscribe(self._on_invalidation)
+
+    async def start(self) -> None:
+        """Create the indexes of the collection, and load the revocations."""
+
+        try:
+            await self.db[self.name].create_index(
+                [("expires_at", ASCENDING)], expireAfterSeconds=0
+            )
+        except PyMongoError as error:
+            _log.warning("Indexing %s failed: %r", self.name, error)
+
+        try:
+            await self.sync()
+        except PyMongoError as error:
+            # Retried by the next sync, which loads every revocation.
+            _log.warning("Loading the revocations failed: %r", error)
+
+    def __len__(self) -> int:
+        return len(self._tokens) + len(self._auths)
+
+    def is_revoked(self, claims: dict[str, Any]) -> bool:
+        """
+        Check whether a token was revoked.
+
+        :param claims: Verified claims of the token.
+        :type claims: dict[str, Any]
+
+        :return: True if the token or its authentication was revoked, else False.
+        :rtype: bool
+        """
+
+        self.checks += 1
+
+        if not (self._tokens or self._auths):
+            return False
+
+        if claims.get("jti") in self._tokens:
+            self.revoked += 1
+            return True
+
+        revoked_at = self._auths.get(claims.get("auth_id"))
+        if revoked_at is not None and claims.get("iat", 0) <= revoked_at:
+            self.revoked += 1
+            return True
+
+        return False
+
+    async def revoke_token(
+        self, jti: str, expires_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Revoke a single token.
+
+        :param jti: ID of the token.
+        :type jti: str
+        :param expires_at: Expiry of the token, after which the revocation is dropped. Defaults to the
+                           longest validity of the tokens.
+        :type expires_at: Optional[datetime]
+        """
+
+        await self._revoke("jti", jti, expires_at)
+
+    async def revoke_auth(self, auth_id: str) -> None:
+        """
+        Revoke every token issued to an authentication so far.
+
+        :param auth_id: ID of the authentication.
+        :type auth_id: str
+        """
+
+        await self._revoke("auth_id", auth_id, None)
+
+    async def _revoke(
+        self, claim: str, value: str, expires_at: Optional[datetime]
+    ) -> None:
+        now = datetime.now(timezone.utc)
+
+        await self.db[self.name].insert_one(
+            {
+                claim: value,
+                "revoked_at": now,
+                "expires_at": expires_at or now + self.max_token_age,
+            }
+        )
+
+        # Effective right away in this worker, the others sync once told through the bus, or on their next
+        # periodic sync.
+        self._add(
+            self._tokens if claim == "jti" else self._auths, value, now.timestamp()
+        )
+
+        if self.bus is not None:
+            self.bus.publish("revocation", f"{claim}:{value}")
+
+    @staticmethod
+    def _add(revoked: dict[str, float], value: str, revoked_at: float) -> None:
+        revoked[value] = max(revoked_at, revoked.get(value, revoked_at))
+
+    async def sync(self) -> None:
+        """Read the revocations inserted since the last sync, or every revocation now and then."""
+
+        self._syncs += 1
+        full = self._since is None or self._syncs % FULL_SYNC_INTERVAL == 0
+
+        query: dict[str, Any] = {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+        if not full:
+            query["_id"] = {"$gte": ObjectId.from_datetime(self._since - SYNC_OVERLAP)}
+
+        started = datetime.now(timezone.utc)
+        tokens: dict[str, float] = {}
+        auths: dict[str, float] = {}
+
+        async for document in self.db[self.name].find(
+            query, {"jti": 1, "auth_id": 1, "revoked_at": 1}
+        ):
+            revoked_at = document["revoked_at"].replace(tzinfo=timezone.utc).timestamp()
+
+            if "jti" in document:
+                self._add(tokens, document["jti"], revoked_at)
+            elif "auth_id" in document:
+                self._add(auths, document["auth_id"], revoked_at)
+
+        if full:
+            # Replaced whole, so the expired revocations are forgotten.
+            self._tokens, self._auths = tokens, auths
+        else:
+            for value, revoked_at in tokens.items():
+                self._add(self._tokens, value, revoked_at)
+            for value, revoked_at in auths.items():
+                self._add(self._auths, value, revoked_at)
+
+        self._since = started
+        _log.debug(
+            "Revocations synced, %s read, %s held", len(tokens) + len(auths), len(self)
+        )
+
+    def _on_invalidation(self, message: Invalidation) -> None:
+        if message.entity != "revocation":
+            return
+
+        # Another instance revoked a token, it is read right away rather than on the next periodic sync.
+        if self._syncing is None or self._syncing.done():
+            self._syncing = asyncio.create_task(self.sync())
+            self._syncing.add_done_callback(self._synced)
+
+    @staticmethod
+    def _synced(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            _log.warning("Syncing the revocations failed: %r", task.exception())
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the number of revoked tokens and authentications, and of the tokens checked and refused."""
+
+        return {
+            "tokens": len(self._tokens),
+            "auths": len(self._auths),
+            "checks": self.checks,
+            "revoked": self.revoked,
+        }
+
+    def __repr__(self) -> str:
+        return f"<RevocationList collection={self.name!r} revocations={len(self)}>"
@@ -0,0 +1,244 @@
+"""Refresh tokens, rotated on every use, issuing new JSON Web Tokens without checking passwords again."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+from pymongo.errors import PyMongoError
+
+from .revocation import RevocationList
+
+_log = logging.getLogger(__name__)
+
+# fmt: off
+__all__ = (
+    'RefreshTokenError',
+    'RefreshTokenReused',
+    'SessionStore',
+)
+# fmt: on
+
+# Number of rotated refresh tokens remembered by each session, to recognize them when reused.
+MAX_ROTATED = 100
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token is malformed, unknown, expired or revoked."""
+
+
+class RefreshTokenReused(RefreshTokenError):
+    """Raised when a refresh token is used after it was rotated, its session is revoked."""
+
+    def __init__(self, message: str, auth_id: str):
+        super().__init__(message)
+        self.auth_id = auth_id
+
+
+def _utc(value: datetime) -> datetime:
+    # Dates are read back from the database without a timezone.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class SessionStore:
+    """
+    Sessions started by a login, each holding the refresh token issuing the next JSON Web Token.
+
+    A refresh token is `<session id>.<secret>`, the secret being 256 random bits of which only the SHA-256
+    digest is stored, so checking it costs a digest instead of a bcrypt hash. Every use rotates the secret,
+    and the session expires after `idle` without being used, or `lifetime` after the login.
+
+    Rotated secrets are remembered. A rotated secret used again means the refresh token was copied, so the
+    session is revoked along with every JSON Web Token issued to its authentication, and the authentication
+    has to log in again.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        name: str = "sessions",
+        idle: timedelta = timedelta(days=1),
+        lifetime: timedelta = timedelta(days=30),
+        revocations: Optional[RevocationList] = None,
+    ):
+        """
+        Initialize the store.
+
+        :param db: Database holding the collection.
+        :type db: AsyncIOMotorDatabase
+        :param name: Name of the collection of sessions.
+        :type name: str
+        :param idle: Time after which a session which was not refreshed expires.
+        :type idle: timedelta
+        :param lifetime: Time after the login after which a session expires, even if refreshed.
+        :type lifetime: timedelta
+        :param revocations: Revocation list of the JSON Web Tokens, revoking the tokens of a reused session.
+        :type revocations: Optional[RevocationList]
+        """
+
+        self.db = db
+        self.name = name
+        self.idle = idle
+        self.lifetime = lifetime
+        self.revocations = revocations
+
+        self.created = 0
+        self.refreshed = 0
+        self.rejected = 0
+        self.reused = 0
+
+    async def start(self) -> None:
+        """Create the indexes of the collection."""
+
+        try:
+            await self.db[self.name].create_index(
+                [("expires_at", ASCENDING)], expireAfterSeconds=0
+            )
+            await self.db[self.name].create_index([("auth_id", ASCENDING)])
+        except PyMongoError as error:
+            _log.warning("Indexing %s failed: %r", self.name, error)
+
+    async def create(self, auth_id: str, validity: int) -> str:
+        """
+        Start a session.
+
+        :param auth_id: ID of the authentication which logged in.
+        :type auth_id: str
+        :param validity: Validity of the JSON Web Tokens issued by the session, in minutes.
+        :type validity: int
+
+        :return: The refresh token of the session.
+        :rtype: str
+        """
+
+        now = datetime.now(timezone.utc)
+        session_id = ObjectId()
+        secret, digest = self._secret()
+
+        await self.db[self.name].insert_one(
+            {
+                "_id": session_id,
+                "auth_id": auth_id,
+                "validity": validity,
+                "token_hash": digest,
+                "rotated": [],
+                "revoked": False,
+                "created_at": now,
+                "refreshed_at": now,
+                "ends_at": now + self.lifetime,
+                "expires_at": now + min(self.idle, self.lifetime),
+            }
+        )
+
+        self.created += 1
+        return f"{session_id}.{secret}"
+
+    async def refresh(self, token: str) -> tuple[dict[str, Any], str]:
+        """
+        Rotate a refresh token.
+
+        :param token: The refresh token.
+        :type token: str
+
+        :return: The session, holding the `auth_id` and `validity` of the JSON Web Token to issue, and the
+                 refresh token replacing the one given.
+        :rtype: tuple[dict[str, Any], str]
+
+        :raises RefreshTokenReused: If the refresh token was already rotated.
+        :raises RefreshTokenError: If the refresh token is malformed, unknown, expired or revoked.
+        """
+
+        now = datetime.now(timezone.utc)
+        session_id, _, secret = token.partition(".")
+
+        if not secret or not ObjectId.is_valid(session_id):
+            self.rejected += 1
+            raise RefreshTokenError("Malformed refresh token.")
+
+        session = await self.db[self.name].find_one({"_id": ObjectId(session_id)})
+        digest = hashlib.sha256(secret.encode()).hexdigest()
+
+        if session is None or session["revoked"] or _utc(session["expires_at"]) <= now:
+            self.rejected += 1
+            raise RefreshTokenError("Unknown, expired or revoked refresh token.")
+
+        if not secrets.compare_digest(session["token_hash"], digest):
+            if digest in session["rotated"]:
+                await self._reused(session)
+
+            self.rejected += 1
+            raise RefreshTokenError("Unknown refresh token.")
+
+        new_secret, new_digest = self._secret()
+        result = await self.db[self.name].update_one(
+            # Only rotated once, a concurrent refresh with the same token finds it rotated.
+            {"_id": session["_id"], "token_hash": digest, "revoked": False},
+            {
+                "$set": {
+                    "token_hash": new_digest,
+                    "refreshed_at": now,
+                    "expires_at": min(now + self.idle, _utc(session["ends_at"])),
+                },
+                "$push": {"rotated": {"$each": [digest], "$slice": -MAX_ROTATED}},
+            },
+        )
+
+        if result.modified_count == 0:
+            await self._reused(session)
+
+        self.refreshed += 1
+        return session, f"{session_id}.{new_secret}"
+
+    async def revoke_auth(self, auth_id: str) -> None:
+        """
+        Revoke every session of an authentication.
+
+        :param auth_id: ID of the authentication.
+        :type auth_id: str
+        """
+
+        await self.db[self.name].update_many(
+            {"auth_id": auth_id, "revoked": False}, {"$set": {"revoked": True}}
+        )
+
+    async def _reused(self, session: dict[str, Any]) -> None:
+        """Revoke a session whose rotated refresh token was used, and raises :class:`RefreshTokenReused`."""
+
+        self.reused += 1
+        auth_id = session["auth_id"]
+        _log.warning("Refresh token of session %s reused", session["_id"])
+
+        await self.db[self.name].update_one(
+            {"_id": session["_id"]}, {"$set": {"revoked": True}}
+        )
+
+        # The copy may have been refreshed first, so the tokens of the authentication can not be trusted.
+        if self.revocations is not None:
+            await self.revocations.revoke_auth(auth_id)
+
+        raise RefreshTokenReused("Reused refresh token, session revoked.", auth_id)
+
+    @staticmethod
+    def _secret() -> tuple[str, str]:
+        """Returns a new secret, and its digest."""
+
+        secret = secrets.token_urlsafe(32)
+        return secret, hashlib.sha256(secret.encode()).hexdigest()
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the number of sessions started, refreshed, and refresh tokens refused or reused."""
+
+        return {
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "rejected": self.rejected,
+            "reused": self.reused,
+        }
+
+    def __repr__(self) -> str:
+        return f"<SessionStore collection={self.name!r} idle={self.idle} lifetime={self.lifetime}>"
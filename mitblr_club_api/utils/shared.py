@@ -0,0 +1,214 @@
+"""A shared memory segment through which the workers of a server share the contents of their caches."""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import struct
+import tempfile
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+from .snapshot import decode_snapshot, encode_snapshot
+
+# fmt: off
+__all__ = (
+    'SharedSegment',
+)
+# fmt: on
+
+# Generation of the published snapshot, odd while a new snapshot is being written.
+_GENERATION = struct.Struct("<Q")
+
+# Number of attempts at reading a snapshot which is being replaced at the same time, and the seconds waited
+# between them.
+READ_ATTEMPTS = 5
+READ_RETRY_DELAY = 0.01
+
+
+class SharedSegment:
+    """
+    A named shared memory segment holding the latest snapshot published by one of several processes.
+
+    One process, the leader, publishes snapshots (see :mod:`~mitblr_club_api.utils.snapshot`) into the
+    segment, the other processes read them. Leadership is held through an exclusive lock on a file, so it
+    passes on to another process once the leader exits, even if it crashes.
+
+    Every publication increments a generation counter at the start of the segment, which is odd while the
+    snapshot is being written. Readers only decode a snapshot when the generation has changed, in a thread
+    so the event loop keeps serving, and retry if it changed while they were decoding. Each reader holds its
+    own decoded copy, only the refresh from the database is saved.
+    """
+
+    def __init__(self, name: str, size: int):
+        """
+        Create the segment, or attach to it if another process already created it.
+
+        :param name: Name of the segment, shared by all the processes.
+        :type name: str
+        :param size: Size of the segment in bytes, ignored when attaching to an existing segment.
+        :type size: int
+        """
+
+        self.name = name
+
+        try:
+            self._memory = SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            self._memory = SharedMemory(name)
+
+        # The segment outlives every single process, it is unlinked once the server stops (see `unlink`).
+        # Otherwise the resource tracker would unlink it as soon as the first process using it exits.
+        resource_tracker.unregister(self._memory._name, "shared_memory")
+
+        self._lock = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), "a+b")
+        self._leader = False
+
+    @property
+    def size(self) -> int:
+        """Size of the segment in bytes."""
+
+        return self._memory.size
+
+    @property
+    def generation(self) -> int:
+        """Generation of the latest published snapshot, 0 if none was published yet."""
+
+        return _GENERATION.unpack_from(self._memory.buf)[0]
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process is the leader."""
+
+        return self._leader
+
+    def acquire_leadership(self) -> bool:
+        """
+        Try to become the leader, without waiting.
+
+        :return: True if this process is (now) the leader, else False.
+        :rtype: bool
+        """
+
+        if not self._leader:
+            try:
+                fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+            self._leader = True
+
+        return True
+
+    def publish(self, version: int, data: dict) -> int:
+        """
+        Publish a snapshot, replacing the previous one. Only the leader may publish.
+
+        :param version: Version of the layout of `data`.
+        :type version: int
+        :param data: Contents of the snapshot, must be encodable as BSON.
+        :type data: dict
+
+        :return: The generation of the published snapshot.
+        :rtype: int
+
+        :raises RuntimeError: If this process is not the leader.
+        :raises ValueError: If the snapshot does not fit in the segment.
+        """
+
+        if not self._leader:
+            raise RuntimeError("Only the leader may publish to the shared segment.")
+
+        snapshot = encode_snapshot(version, data)
+        end = _GENERATION.size + len(snapshot)
+
+        if end > self.size:
+            raise ValueError(
+                f"Snapshot of {len(snapshot)} bytes does not fit in the shared segment of {self.size} bytes."
+            )
+
+        generation = self.generation
+        # Start at an odd generation, even if the previous leader died while writing.
+        writing = generation + 1 if generation % 2 == 0 else generation + 2
+
+        _GENERATION.pack_into(self._memory.buf, 0, writing)
+        self._memory.buf[_GENERATION.size : end] = snapshot
+        _GENERATION.pack_into(self._memory.buf, 0, writing + 1)
+
+        return writing + 1
+
+    async def read(self, version: int, since: int = 0) -> Optional[tuple[int, dict]]:
+        """
+        Read the latest snapshot, if it was published after the generation `since`.
+
+        :param version: Expected version of the contents.
+        :type version: int
+        :param since: Generation of the snapshot read previously.
+        :type since: int
+
+        :return: The generation and contents of the snapshot, or None if no newer snapshot was published.
+        :rtype: Optional[tuple[int, dict]]
+
+        :raises ValueError: If the snapshot is of another version, or could not be read consistently.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        for _ in range(READ_ATTEMPTS):
+            generation = self.generation
+
+            if generation == since:
+                return None
+
+            if generation % 2 == 1:
+                # Being written.
+                await asyncio.sleep(READ_RETRY_DELAY)
+                continue
+
+            try:
+                data = await loop.run_in_executor(None, self._decode, version)
+            except ValueError:
+                # Replaced while it was being decoded, unless the generation did not change.
+                if self.generation == generation:
+                    raise
+
+                continue
+
+            if self.generation == generation:
+                return generation, data
+
+        raise ValueError("The shared segment is being written too often to be read.")
+
+    def _decode(self, version: int) -> dict:
+        with self._memory.buf[_GENERATION.size :] as buffer:
+            return decode_snapshot(buffer, version)
+
+    def close(self) -> None:
+        """Detach from the segment and give up leadership."""
+
+        self._lock.close()
+        self._leader = False
+        self._memory.close()
+
+    @staticmethod
+    def unlink(name: str) -> None:
+        """
+        Destroy a segment, once no process uses it anymore.
+
+        :param name: Name of the segment.
+        :type name: str
+        """
+
+        try:
+            memory = SharedMemory(name)
+        except FileNotFoundError:
+            return
+
+        memory.close()
+        memory.unlink()
+
+    def __repr__(self) -> str:
+        return (
+            f"<SharedSegment name={self.name!r} size={self.size} leader={self._leader}>"
+        )
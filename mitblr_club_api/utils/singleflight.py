@@ -0,0 +1,102 @@
+"""Coalescing of concurrent calls for the same key into a single in-flight call."""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+# fmt: off
+__all__ = (
+    'SingleFlight',
+)
+# fmt: on
+
+
+class SingleFlight:
+    """
+    Ensures only one call per key is in flight at any time.
+
+    The first caller for a key starts the call, every concurrent caller for the same key waits on that
+    call and receives its result, or its exception. Once the call completes the key is released, so the
+    next caller starts a fresh call.
+
+    Calls are counted per namespace, so the number of calls that were coalesced into an in-flight one can
+    be reported for each kind of entity.
+    """
+
+    def __init__(self):
+        self._calls: dict[tuple[str, Hashable], asyncio.Future] = {}
+        self._counters: defaultdict[str, dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "executed": 0, "coalesced": 0}
+        )
+
+    async def do(
+        self, namespace: str, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        Run `func` unless a call for the same key is already in flight, in which case wait for it.
+
+        :param namespace: Namespace of the key (e.g. `"student"`), used for the counters.
+        :type namespace: str
+        :param key: Key identifying the call within the namespace.
+        :type key: Hashable
+        :param func: Zero argument coroutine function performing the call.
+        :type func: Callable[[], Awaitable[T]]
+
+        :return: The result of the (possibly shared) call.
+        :rtype: T
+        """
+
+        flight_key = (namespace, key)
+        counters = self._counters[namespace]
+        counters["calls"] += 1
+
+        call = self._calls.get(flight_key)
+
+        if call is None:
+            counters["executed"] += 1
+
+            call = asyncio.ensure_future(func())
+            self._calls[flight_key] = call
+            call.add_done_callback(lambda done: self._release(flight_key, done))
+        else:
+            counters["coalesced"] += 1
+
+        # Shielded, so a cancelled caller does not cancel the call the other callers are waiting on.
+        return await asyncio.shield(call)
+
+    def in_flight(self, namespace: str, key: Hashable) -> bool:
+        """
+        Check if a call for the given key is currently in flight.
+
+        :param namespace: Namespace of the key.
+        :type namespace: str
+        :param key: Key identifying the call within the namespace.
+        :type key: Hashable
+
+        :return: True if a call is in flight, else False.
+        :rtype: bool
+        """
+
+        return (namespace, key) in self._calls
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Counters of calls made, calls executed and calls coalesced, per namespace."""
+
+        return {
+            namespace: dict(counters) for namespace, counters in self._counters.items()
+        }
+
+    def _release(self, flight_key: tuple[str, Hashable], call: asyncio.Future) -> None:
+        if self._calls.get(flight_key) is call:
+            del self._calls[flight_key]
+
+        # Mark the exception as retrieved, every caller may have been cancelled in the meantime.
+        if not call.cancelled():
+            call.exception()
+
+    def __repr__(self) -> str:
+        return f"<SingleFlight in_flight={len(self._calls)}>"
@@ -0,0 +1,68 @@
+"""Estimation of the memory used by cached objects."""
+from __future__ import annotations
+
+import sys
+from enum import Enum
+from typing import Any, Optional
+
+# fmt: off
+__all__ = (
+    'approximate_size',
+)
+# fmt: on
+
+# Objects shared by the whole process, which are not accounted to any single cached object.
+_SHARED = (type, Enum, bool, type(None))
+
+
+def approximate_size(obj: Any, seen: Optional[set[int]] = None) -> int:
+    """
+    Approximate the number of bytes used by an object and everything it references.
+
+    Containers, pydantic models, and objects with a `__dict__` or `__slots__` are followed recursively.
+    Objects referenced more than once are only counted once, classes and enum members are not counted.
+
+    :param obj: Object to measure.
+    :type obj: Any
+    :param seen: Ids of the objects which were already counted, shared across calls when measuring
+                 several objects that may reference each other.
+    :type seen: Optional[set[int]]
+
+    :return: The approximate size in bytes.
+    :rtype: int
+    """
+
+    if seen is None:
+        seen = set()
+
+    if isinstance(obj, _SHARED) or id(obj) in seen:
+        return 0
+
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, (str, bytes, bytearray, int, float)):
+        return size
+
+    if isinstance(obj, dict):
+        return size + sum(
+            approximate_size(key, seen) + approximate_size(value, seen)
+            for key, value in obj.items()
+        )
+
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approximate_size(item, seen) for item in obj)
+
+    # Pydantic keeps its fields in `__dict__`, and private attributes (such as `_id`) apart.
+    private = getattr(obj, "__pydantic_private__", None)
+    if private:
+        size += approximate_size(private, seen)
+
+    if hasattr(obj, "__dict__"):
+        size += approximate_size(vars(obj), seen)
+
+    for slot in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, slot):
+            size += approximate_size(getattr(obj, slot), seen)
+
+    return size
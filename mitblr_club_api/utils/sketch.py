@@ -0,0 +1,98 @@
+"""An approximate frequency counter for cache admission decisions."""
+from __future__ import annotations
+
+from array import array
+from typing import Hashable
+
+# fmt: off
+__all__ = (
+    'FrequencySketch',
+)
+# fmt: on
+
+# Odd multipliers of the (multiply-shift) hash functions, one per row of the sketch.
+_SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+)
+
+_MASK_64 = (1 << 64) - 1
+
+# Counters saturate at this value, recent popularity matters more than the exact count.
+_MAX_COUNT = 15
+
+
+class FrequencySketch:
+    """
+    A count-min sketch estimating how often keys were seen recently, as used by TinyLFU.
+
+    Every key is counted in one small saturating counter per row, the estimate being the minimum of its
+    counters. Once the number of increments reaches ten times the width of the sketch, every counter is
+    halved, so that the estimates reflect recent rather than all-time popularity.
+    """
+
+    def __init__(self, width: int = 4096):
+        """
+        Initialize the sketch.
+
+        :param width: Number of counters per row, rounded up to a power of two. It should be a few times
+                      the number of entries the cache can hold.
+        :type width: int
+        """
+
+        bits = max(width - 1, 1).bit_length()
+        width = 1 << bits
+
+        self._shift: int = 64 - bits
+        self._rows: list[array] = [array("B", bytes(width)) for _ in _SEEDS]
+        self._additions: int = 0
+        self._sample_size: int = 10 * width
+
+    def _indexes(self, key: Hashable) -> list[int]:
+        # The high bits of the products are used, as they depend on every bit of the hash.
+        digest = hash(key) & _MASK_64
+        digest ^= digest >> 32
+
+        return [((digest * seed) & _MASK_64) >> self._shift for seed in _SEEDS]
+
+    def increment(self, key: Hashable) -> None:
+        """
+        Count an occurrence of a key.
+
+        :param key: The key which was seen.
+        :type key: Hashable
+        """
+
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < _MAX_COUNT:
+                row[index] += 1
+
+        self._additions += 1
+
+        if self._additions >= self._sample_size:
+            self._age()
+
+    def estimate(self, key: Hashable) -> int:
+        """
+        Estimate how often a key was seen recently.
+
+        :param key: The key to estimate the frequency of.
+        :type key: Hashable
+
+        :return: The estimated frequency, never lower than the actual one (before ageing).
+        :rtype: int
+        """
+
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def _age(self) -> None:
+        """Halve every counter."""
+
+        for row in self._rows:
+            for index, count in enumerate(row):
+                if count:
+                    row[index] = count >> 1
+
+        self._additions //= 2
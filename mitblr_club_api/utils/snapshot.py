@@ -0,0 +1,150 @@
+"""Versioned snapshot files, used to persist the caches across restarts."""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+
+import bson
+from bson.errors import BSONError
+
+# fmt: off
+__all__ = (
+    'decode_snapshot',
+    'encode_snapshot',
+    'read_snapshot',
+    'write_snapshot',
+)
+# fmt: on
+
+_MAGIC = b"MBCS"
+
+# Magic bytes, version of the contents, CRC32 and length of the BSON body.
+_HEADER = struct.Struct("<4sHxxIQ")
+
+
+def encode_snapshot(version: int, data: dict) -> bytes:
+    """
+    Encode the contents of a snapshot.
+
+    The result holds a fixed size header, identifying the format and the version of the contents, followed
+    by the contents encoded as BSON.
+
+    :param version: Version of the layout of `data`, a snapshot is only decoded by the same version.
+    :type version: int
+    :param data: Contents of the snapshot, must be encodable as BSON.
+    :type data: dict
+
+    :return: The encoded snapshot.
+    :rtype: bytes
+    """
+
+    body = bson.encode(data)
+    return _HEADER.pack(_MAGIC, version, zlib.crc32(body), len(body)) + body
+
+
+def decode_snapshot(buffer: memoryview, version: int) -> dict:
+    """
+    Decode a snapshot encoded by :func:`encode_snapshot` from the start of a buffer.
+
+    The checksum is computed over a view of the buffer, the decoded contents are copies.
+
+    The buffer may be larger than the snapshot, anything past its end is ignored.
+
+    :param buffer: Buffer starting with the snapshot.
+    :type buffer: memoryview
+    :param version: Expected version of the contents.
+    :type version: int
+
+    :return: The contents of the snapshot.
+    :rtype: dict
+
+    :raises ValueError: If the buffer does not hold a snapshot, holds a corrupted one, or one of another
+                        version.
+    """
+
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Snapshot is truncated.")
+
+    magic, found_version, checksum, length = _HEADER.unpack_from(buffer)
+
+    if magic != _MAGIC:
+        raise ValueError("Buffer does not hold a snapshot.")
+
+    if found_version != version:
+        raise ValueError(f"Snapshot is of version {found_version}, expected {version}.")
+
+    if len(buffer) - _HEADER.size < length:
+        raise ValueError("Snapshot is truncated.")
+
+    with buffer[_HEADER.size : _HEADER.size + length] as body:
+        if zlib.crc32(body) != checksum:
+            raise ValueError("Snapshot is corrupted.")
+
+        try:
+            return bson.decode(body)
+        except BSONError as error:
+            raise ValueError(f"Snapshot is corrupted: {error}") from error
+
+
+def write_snapshot(path: str, version: int, data: dict) -> int:
+    """
+    Atomically write a snapshot file, replacing any previous snapshot at the same path.
+
+    :param path: Path of the snapshot file.
+    :type path: str
+    :param version: Version of the layout of `data`, a snapshot is only read back by the same version.
+    :type version: int
+    :param data: Contents of the snapshot, must be encodable as BSON.
+    :type data: dict
+
+    :return: The size of the snapshot file, in bytes.
+    :rtype: int
+    """
+
+    snapshot = encode_snapshot(version, data)
+
+    # Written beside the snapshot and renamed over it, so readers (such as other workers) never see a
+    # partially written file.
+    temporary = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(temporary, "wb") as file:
+            file.write(snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return len(snapshot)
+
+
+def read_snapshot(path: str, version: int) -> dict:
+    """
+    Read a snapshot file written by :func:`write_snapshot`.
+
+    The file is memory mapped, so the snapshot is decoded without first being copied into memory.
+
+    :param path: Path of the snapshot file.
+    :type path: str
+    :param version: Expected version of the contents.
+    :type version: int
+
+    :return: The contents of the snapshot.
+    :rtype: dict
+
+    :raises FileNotFoundError: If there is no snapshot at `path`.
+    :raises ValueError: If the file is not a snapshot, is corrupted, or is of another version.
+    """
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError("Snapshot is truncated.")
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                return decode_snapshot(view, version)
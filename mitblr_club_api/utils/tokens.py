@@ -0,0 +1,125 @@
+"""A cache of verified JSON Web Tokens, so each token's signature is only verified once per worker."""
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Any, Optional
+
+from cachetools import TLRUCache
+from jwt import ExpiredSignatureError, ImmatureSignatureError
+
+from .keys import KeyManager
+from .metrics import CacheMetrics
+
+# fmt: off
+__all__ = (
+    'TokenCache',
+)
+# fmt: on
+
+
+class TokenCache:
+    """
+    Caches the claims of verified tokens, keyed by the SHA-256 digest of the token.
+
+    Verifying the signature of a token is costly, while clients send the same token with every request. A
+    token is verified on its first use, its claims are then served from the cache until the token expires.
+    The time based claims (`nbf` and `exp`) are still checked on every use, which is cheap.
+
+    Tokens failing verification are never cached.
+    """
+
+    def __init__(
+        self,
+        keys: KeyManager,
+        maxsize: int = 10_000,
+        max_ttl: float = 3600,
+        leeway: float = 0,
+    ):
+        """
+        Initialize the cache.
+
+        :param keys: Keys verifying the tokens.
+        :type keys: KeyManager
+        :param maxsize: Maximum number of cached tokens, the least recently used are evicted first.
+        :type maxsize: int
+        :param max_ttl: Seconds tokens without an expiry (`exp`) are cached for.
+        :type max_ttl: float
+        :param leeway: Seconds of leeway when checking the time based claims, as in :func:`jwt.decode`.
+        :type leeway: float
+        """
+
+        self.keys = keys
+        self.max_ttl = max_ttl
+        self.leeway = leeway
+        self.metrics = CacheMetrics()
+
+        # Expiry is on the wall clock, which the `exp` claim is expressed in.
+        self._tokens = TLRUCache(maxsize, ttu=self._expires_at, timer=time.time)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """
+        Verify a token and return its claims, as :meth:`KeyManager.decode` does.
+
+        :param token: Encoded token.
+        :type token: str
+
+        :return: The claims of the token, as a copy the caller may modify.
+        :rtype: dict[str, Any]
+
+        :raises jwt.InvalidTokenError: If the token is invalid, immature or expired.
+        """
+
+        digest = hashlib.sha256(token.encode()).digest()
+        claims: Optional[dict[str, Any]] = self._tokens.get(digest)
+
+        if claims is None:
+            self.metrics.misses += 1
+
+            with self.metrics.time_load():
+                claims = self.keys.decode(token, leeway=self.leeway)
+
+            self._tokens[digest] = claims
+        else:
+            self.metrics.hits += 1
+            self._check_times(claims)
+
+        return dict(claims)
+
+    def clear(self) -> None:
+        """Forget every verified token, for instance once a key was retired."""
+
+        self._tokens.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the metrics and size of the cache."""
+
+        return {
+            **self.metrics.snapshot(),
+            "size": len(self._tokens),
+            "maxsize": self._tokens.maxsize,
+        }
+
+    def _check_times(self, claims: dict[str, Any]) -> None:
+        """Checks the time based claims of a cached token, like :func:`jwt.decode`."""
+
+        now = time.time()
+
+        if "nbf" in claims and claims["nbf"] > now + self.leeway:
+            raise ImmatureSignatureError("The token is not yet valid (nbf)")
+
+        if "exp" in claims and claims["exp"] <= now - self.leeway:
+            raise ExpiredSignatureError("Signature has expired")
+
+    def _expires_at(self, _digest: bytes, claims: dict[str, Any], now: float) -> float:
+        """Time at which a verified token leaves the cache."""
+
+        expires_at = now + self.max_ttl
+
+        if "exp" in claims:
+            expires_at = min(expires_at, claims["exp"] + self.leeway)
+
+        return expires_at
+
+    def __repr__(self) -> str:
+        return f"<TokenCache size={len(self._tokens)} maxsize={self._tokens.maxsize}>"
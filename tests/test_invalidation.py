@@ -0,0 +1,124 @@
+import asyncio
+import unittest
+
+from bson import ObjectId
+
+from mitblr_club_api.models.cache_tup import Cache
+from mitblr_club_api.utils.invalidation import (
+    Invalidation,
+    InvalidationBus,
+    InvalidationTransport,
+    LocalTransport,
+)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, query, *args, **kwargs):
+        for doc in self.docs:
+            if all(doc.get(key) == value for key, value in query.items()):
+                return doc
+
+        return None
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+def team_document(**fields):
+    return {
+        "_id": ObjectId(),
+        "api_access": True,
+        "club": "codex",
+        "permissions": {"mark_attendance": True},
+        "position": {"type": "Core", "name": "Lead"},
+        "student_id": ObjectId(),
+        "perm_version": 1,
+        **fields,
+    }
+
+
+async def settle():
+    # Lets the buses deliver the published messages.
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestLocalTransport(unittest.IsolatedAsyncioTestCase):
+    def test_transport_is_abstract(self):
+        with self.assertRaises(TypeError):
+            InvalidationTransport()
+
+    async def test_buses_of_a_channel_receive_each_other(self):
+        received = []
+        publisher = InvalidationBus(LocalTransport("transport"), origin="a")
+        subscriber = InvalidationBus(LocalTransport("transport"), origin="b")
+        other = InvalidationBus(LocalTransport("other"), origin="c")
+
+        subscriber.subscribe(received.append)
+        publisher.subscribe(received.append)
+        other.subscribe(received.append)
+
+        for bus in (publisher, subscriber, other):
+            await bus.start()
+            self.addAsyncCleanup(bus.close)
+
+        publisher.publish("student", "1")
+        await settle()
+
+        # Not handed back to the publisher, nor to the buses of other channels.
+        self.assertEqual(received, [Invalidation("student", "1", None, "a")])
+
+
+class TestCacheInvalidation(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.db = FakeDatabase()
+        self.buses = [
+            InvalidationBus(LocalTransport("cache"), origin=origin)
+            for origin in ("a", "b")
+        ]
+        self.a, self.b = (Cache(self.db, 2023, bus=bus) for bus in self.buses)
+
+        for bus in self.buses:
+            await bus.start()
+            self.addAsyncCleanup(bus.close)
+
+    async def test_evicted_team_is_evicted_by_other_caches(self):
+        document = team_document()
+        self.db["club_teams"].docs.append(document)
+        team_id = str(document["_id"])
+
+        await self.a.get_team(team_id)
+        await self.b.get_team(team_id)
+        self.assertEqual(self.b.team_version(team_id), 1)
+
+        # The permissions change, and the writer evicts its copy.
+        document.update(permissions={}, perm_version=2)
+        self.a.evict_team(team_id)
+        await settle()
+
+        self.assertIsNone(self.b.team_version(team_id))
+
+        team = await self.b.get_team(team_id)
+        self.assertEqual(team.perm_version, 2)
+        self.assertEqual(int(team.grants), 0)
+        self.assertEqual(self.buses[1].received, 1)
+
+    async def test_written_student_is_evicted_by_other_caches(self):
+        student_id = ObjectId()
+        key = self.b._student_key(str(student_id))
+        self.b._missing_cache[("student", key)] = True
+
+        self.a.forget_missing_student(str(student_id))
+        await settle()
+
+        self.assertNotIn(("student", key), self.b._missing_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
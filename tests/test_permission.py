@@ -0,0 +1,26 @@
+import unittest
+
+from mitblr_club_api.models.enums.permission import Permission
+
+
+class TestPermission(unittest.TestCase):
+    def test_from_document(self):
+        granted = Permission.from_document(
+            {"get_event": True, "mark_attendance": True, "delete_event": False}
+        )
+
+        self.assertEqual(granted, Permission.GET_EVENT | Permission.MARK_ATTENDANCE)
+
+    def test_legacy_key(self):
+        granted = Permission.from_document({"modify_attendace": True})
+        self.assertEqual(granted, Permission.MODIFY_ATTENDANCE)
+
+        # The correct key wins over the legacy one.
+        granted = Permission.from_document(
+            {"modify_attendance": False, "modify_attendace": True}
+        )
+        self.assertEqual(granted, Permission(0))
+
+
+if __name__ == "__main__":
+    unittest.main()